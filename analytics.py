@@ -0,0 +1,534 @@
+"""
+Calculos con pandas, numpy y statsmodels: columnas e indices de las
+reservas (reservas, reportes, calendario) y prediccion (ADF + ARIMA).
+
+app.py importa este modulo de forma diferida (ver analitica()): los
+workers que solo sirven paginas de listas no cargan pandas ni statsmodels,
+y statsmodels se importa recien al ajustar un modelo.
+
+Las funciones de prediccion se ejecutan en un pool de procesos aparte (ver
+ForecastPool en app.py), por eso reciben y devuelven objetos que se pueden
+serializar: la serie diaria como pd.Series y el resultado como dict de listas.
+"""
+import hashlib
+import importlib
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------
+#  Reservas en columnas
+# ---------------------------
+
+FORMATOS_FECHA = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+
+
+def parse_dt(dt_str: str):
+    if not dt_str:
+        return None
+    for fmt in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(dt_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_fechas(valores) -> pd.Series:
+    """
+    Parseo en bloque de fechas del backend (datetime64, NaT si no se puede).
+    Detecta el formato con el primer valor, convierte toda la columna de una
+    vez y solo las filas que no respetan ese formato pasan por parse_dt.
+    """
+    textos = pd.Series(valores, dtype=object)
+    fechas = pd.Series(pd.NaT, index=textos.index, dtype='datetime64[ns]')
+    presentes = textos.map(lambda v: isinstance(v, str) and v != '').astype(bool)
+    if not presentes.any():
+        return fechas
+
+    muestra = textos[presentes].iloc[0]
+    formato = next((fmt for fmt in FORMATOS_FECHA if _respeta_formato(muestra, fmt)), None)
+    if formato is not None:
+        fechas[presentes] = pd.to_datetime(textos[presentes], format=formato, errors='coerce')
+
+    # Filas raras (otro formato): se intenta uno por uno
+    for i in fechas.index[presentes & fechas.isna()]:
+        dt = parse_dt(textos[i])
+        if dt is not None:
+            try:
+                fechas[i] = dt
+            except (OverflowError, ValueError):
+                pass
+    return fechas
+
+
+def _respeta_formato(texto: str, formato: str) -> bool:
+    try:
+        datetime.strptime(texto, formato)
+        return True
+    except ValueError:
+        return False
+
+
+def nombre_recurso(res: dict) -> str:
+    sala = (res['sala'] or {}).get('nombre')
+    articulo = (res['articulo'] or {}).get('nombre')
+    if sala:
+        return "Sala: " + str(sala)
+    elif articulo:
+        return "Artículo: " + str(articulo)
+    return 'Recurso: N/D'
+
+
+def id_recurso(res: dict):
+    """Clave estable del recurso reservado ('sala:<id>' / 'articulo:<id>'), o None."""
+    if res['sala'] and res['sala'].get('idSala') is not None:
+        return f"sala:{res['sala']['idSala']}"
+    if res['articulo'] and res['articulo'].get('idArticulo') is not None:
+        return f"articulo:{res['articulo']['idArticulo']}"
+    return None
+
+
+def frame_reservas(snap) -> pd.DataFrame:
+    """
+    Vista columnar de las reservas: persona y recurso como categorias
+    (en orden de aparicion) e inicio/fin como datetime64.
+    """
+    records = snap.records
+    personas = [res['persona'].get('nombre') or res['persona'].get('email') or 'N/D' for res in records]
+    recursos = [nombre_recurso(res) for res in records]
+    recurso_ids = [id_recurso(res) for res in records]
+    inicio = pd.Series([res['inicio'] for res in records], dtype=object)
+
+    # Fecha como texto solo para las filas cuyo inicio no se pudo parsear:
+    # se toma lo anterior a la 'T' o al espacio, como antes
+    con_fecha = inicio.notna() & (inicio != '') & snap.inicios.isna()
+    texto = inicio[con_fecha]
+    fecha = texto.str.split(' ', n=1).str[0].where(
+        ~texto.str.contains('T', regex=False), texto.str.split('T', n=1).str[0])
+    fecha = fecha.mask(fecha == '', 'Desconocido')
+
+    return pd.DataFrame({
+        'persona': pd.Categorical(personas, categories=pd.unique(pd.Series(personas, dtype=object))),
+        'recurso': pd.Categorical(recursos, categories=pd.unique(pd.Series(recursos, dtype=object))),
+        'recurso_id': pd.Series(recurso_ids, dtype=object),
+        'fecha_texto': fecha.reindex(inicio.index),
+        'inicio': snap.inicios,
+        'fin': snap.fines,
+    })
+
+
+def indice_reservas(snap) -> dict:
+    """Posiciones de las reservas por persona, sala y artículo ({campo: {id: array}})."""
+    records = snap.records
+    ids = pd.DataFrame({
+        'persona': [res['persona'].get('idPersona') for res in records],
+        'sala': [(res['sala'] or {}).get('idSala') for res in records],
+        'articulo': [(res['articulo'] or {}).get('idArticulo') for res in records],
+    }, dtype=object)
+    if ids.empty:
+        return {campo: {} for campo in ids.columns}
+    return {campo: {str(k): v for k, v in ids.groupby(campo).indices.items()} for campo in ids.columns}
+
+
+def orden_reservas(snap, campo: str) -> np.ndarray:
+    """Posiciones de las reservas ordenadas por campo (estable, vacíos al final)."""
+    if campo == 'inicio':
+        valores = snap.inicios
+    elif campo == 'fin':
+        valores = snap.fines
+    elif campo in ('persona', 'recurso'):
+        valores = snap.derivado('frame', frame_reservas)[campo].astype(str)
+    else:
+        valores = pd.Series([res['id'] for res in snap.records], dtype=object)
+    return valores.reset_index(drop=True).sort_values(kind='stable', na_position='last').index.to_numpy()
+
+
+def _fecha_param(valor: str):
+    try:
+        return np.datetime64(datetime.strptime(valor, '%Y-%m-%d'), 'ns') if valor else None
+    except ValueError:
+        return None
+
+
+def posiciones_reservas(snap, sort: str, desc: bool, filtros: dict):
+    """
+    Posiciones de las reservas ordenadas por `sort` (orden del backend si
+    viene vacío) y filtradas por persona, sala, articulo, desde y hasta con
+    los índices del snapshot. Devuelve (posiciones, filtros aplicados).
+    """
+    n = len(snap.records)
+    if sort:
+        orden = snap.derivado(f'orden:{sort}', partial(orden_reservas, campo=sort))
+    else:
+        orden = np.arange(n)
+    if desc:
+        orden = orden[::-1]
+
+    # Filtros: mascara booleana sobre las posiciones
+    aplicados = {}
+    mascara = None
+    indice = snap.derivado('indice', indice_reservas)
+    for campo in ('persona', 'sala', 'articulo'):
+        valor = filtros.get(campo)
+        if not valor:
+            continue
+        aplicados[campo] = valor
+        m = np.zeros(n, dtype=bool)
+        m[indice[campo].get(valor, np.array([], dtype=np.intp))] = True
+        mascara = m if mascara is None else mascara & m
+    desde = _fecha_param(filtros.get('desde', ''))
+    hasta = _fecha_param(filtros.get('hasta', ''))
+    if desde is not None or hasta is not None:
+        inicios = snap.inicios.to_numpy()
+        m = ~np.isnat(inicios)
+        if desde is not None:
+            m &= inicios >= desde
+            aplicados['desde'] = filtros['desde']
+        if hasta is not None:
+            m &= inicios < hasta + np.timedelta64(1, 'D')
+            aplicados['hasta'] = filtros['hasta']
+        mascara = m if mascara is None else mascara & m
+    if mascara is not None:
+        orden = orden[mascara[orden]]
+    return orden, aplicados
+
+
+def metricas_reportes(snap) -> dict:
+    """Contadores, top N y serie por fecha de reportes() calculados con group-bys."""
+    frame = snap.derivado('frame', frame_reservas)
+
+    # Top N para gráficos (empates en orden de aparicion, como el sorted() estable)
+    def topn(columna, n=10):
+        conteo = frame[columna].value_counts(sort=False)
+        conteo = conteo[conteo > 0].sort_values(ascending=False, kind='stable').head(n)
+        return [str(k) for k in conteo.index], [int(v) for v in conteo.values]
+
+    personas_labels, personas_vals = topn('persona', 10)
+    recurso_labels, recurso_vals = topn('recurso', 10)
+    # Por fecha: conteo sobre datetime64 y formato solo de los dias distintos
+    dias = frame['inicio'].dropna().dt.normalize().value_counts()
+    por_fecha = pd.Series(dias.values, index=dias.index.strftime('%Y-%m-%d'))
+    raras = frame['fecha_texto'].dropna()
+    if not raras.empty:
+        por_fecha = pd.concat([por_fecha, raras.value_counts()]).groupby(level=0).sum()
+    por_fecha = por_fecha.sort_index()
+
+    return {
+        'total': len(frame),
+        'personas_labels': personas_labels,
+        'personas_vals': personas_vals,
+        'recurso_labels': recurso_labels,
+        'recurso_vals': recurso_vals,
+        'fecha_labels': [str(k) for k in por_fecha.index],
+        'fecha_vals': [int(v) for v in por_fecha.values],
+    }
+
+
+def indice_eventos(snap) -> dict:
+    """
+    Reservas con inicio válido ordenadas por inicio (ns), con su fin y la
+    duración máxima: las que solapan una ventana están entre
+    inicio - duracion_max y el fin de la ventana.
+    """
+    inicios = snap.inicios.to_numpy()
+    fines = snap.fines.to_numpy()
+    validas = np.flatnonzero(~np.isnat(inicios))
+    validas = validas[np.argsort(inicios[validas], kind='stable')]
+    ini = inicios[validas].astype('int64')
+    fin = fines[validas]
+    fin = np.where(np.isnat(fin), ini, fin.astype('int64'))
+    fin = np.maximum(fin, ini)
+    return {
+        'posiciones': validas,
+        'inicios': ini,
+        'fines': fin,
+        'duracion_max': int((fin - ini).max()) if len(ini) else 0,
+    }
+
+
+def instante_param(valor: str):
+    """Fecha ISO de FullCalendar a ns (hora local tal cual, sin zona)."""
+    if not valor:
+        return None
+    try:
+        ts = pd.Timestamp(valor)
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.value
+
+
+def eventos_rango(snap, desde: int = None, hasta: int = None) -> list:
+    """Eventos del calendario que solapan [desde, hasta) por búsqueda binaria."""
+    idx = snap.derivado('eventos', indice_eventos)
+    ini, fin = idx['inicios'], idx['fines']
+    lo, hi = 0, len(ini)
+    if desde is not None:
+        lo = int(np.searchsorted(ini, desde - idx['duracion_max'], side='left'))
+    if hasta is not None:
+        hi = int(np.searchsorted(ini, hasta, side='left'))
+    sel = np.arange(lo, max(lo, hi))
+    if desde is not None:
+        sel = sel[(fin[sel] > desde) | (ini[sel] >= desde)]
+
+    frame = snap.derivado('frame', frame_reservas)
+    personas, recursos = frame['persona'], frame['recurso']
+    eventos = []
+    for i in idx['posiciones'][sel]:
+        res = snap.records[i]
+        eventos.append({'title': f"{personas.iat[i]} - {recursos.iat[i]}", 'start': res['inicio'], 'end': res['fin']})
+    return eventos
+
+
+def indice_intervalos(snap) -> dict:
+    """
+    Intervalos por recurso ('sala:<id>' / 'articulo:<id>'): inicios
+    ordenados (ns), fines, máximo acumulado de los fines e id de cada
+    reserva. Quedan fuera las reservas sin inicio válido o sin recurso;
+    las que no tienen fin cuentan como un instante.
+    """
+    recursos = snap.derivado('frame', frame_reservas)['recurso_id'].to_numpy(dtype=object)
+    inicios = snap.inicios.to_numpy()
+    fines = snap.fines.to_numpy()
+    validas = np.flatnonzero(~np.isnat(inicios) & pd.notna(recursos))
+    if len(validas) == 0:
+        return {}
+    codigos, nombres = pd.factorize(recursos[validas])
+    ini = inicios[validas].astype('int64')
+    fin = fines[validas]
+    fin = np.maximum(np.where(np.isnat(fin), ini, fin.astype('int64')), ini)
+
+    orden = np.lexsort((ini, codigos))
+    codigos, ini, fin, validas = codigos[orden], ini[orden], fin[orden], validas[orden]
+    cortes = np.flatnonzero(np.diff(codigos)) + 1
+    indice = {}
+    for a, b in zip(np.r_[0, cortes], np.r_[cortes, len(codigos)]):
+        indice[nombres[codigos[a]]] = {
+            'inicios': ini[a:b],
+            'fines': fin[a:b],
+            'max_fin': np.maximum.accumulate(fin[a:b]),
+            'ids': [snap.records[i]['id'] for i in validas[a:b]],
+        }
+    return indice
+
+
+def solapadas(snap, recurso: str, desde: int, hasta: int, excluir=None) -> list:
+    """
+    Ids de las reservas del recurso que se superponen con [desde, hasta)
+    (ns). Las candidatas empiezan antes de `hasta` y están después del
+    primer punto donde el máximo acumulado de los fines supera `desde`.
+    """
+    intervalos = snap.derivado('intervalos', indice_intervalos).get(recurso)
+    if intervalos is None or hasta <= desde:
+        return []
+    lo = int(np.searchsorted(intervalos['max_fin'], desde, side='right'))
+    hi = int(np.searchsorted(intervalos['inicios'], hasta, side='left'))
+    sel = np.arange(lo, max(lo, hi))
+    sel = sel[intervalos['fines'][sel] > desde]
+    ids = intervalos['ids']
+    return [ids[i] for i in sel if excluir is None or str(ids[i]) != str(excluir)]
+
+
+# ---------------------------
+#  Disponibilidad de salas
+# ---------------------------
+
+def indice_capacidad(salas: list) -> dict:
+    """Salas normalizadas ordenadas por capacidad (las que no la informan van primero, como -1)."""
+    capacidades = np.array([-1 if s['capacidad'] is None else s['capacidad'] for s in salas], dtype=np.int64)
+    orden = np.argsort(capacidades, kind='stable')
+    return {
+        'capacidades': capacidades[orden],
+        'salas': [salas[i] for i in orden],
+        'recursos': [f"sala:{salas[i]['id']}" for i in orden],
+        'por_id': {str(s['id']): s for s in salas},
+    }
+
+
+def indice_salas(snap) -> dict:
+    """
+    Los intervalos de las salas de indice_intervalos concatenados (un tramo
+    por sala, en el mismo orden) para consultar todas las salas a la vez.
+    """
+    intervalos = snap.derivado('intervalos', indice_intervalos)
+    salas = [r for r in intervalos if r.startswith('sala:')]
+    largos = np.array([len(intervalos[r]['inicios']) for r in salas], dtype=np.int64)
+    vacio = np.empty(0, dtype=np.int64)
+    return {
+        'salas': salas,
+        'comienzos': np.cumsum(largos) - largos,
+        'largos': largos,
+        'inicios': np.concatenate([intervalos[r]['inicios'] for r in salas]) if salas else vacio,
+        'max_fin': np.concatenate([intervalos[r]['max_fin'] for r in salas]) if salas else vacio,
+    }
+
+
+def salas_ocupadas(snap, desde: int, hasta: int) -> set:
+    """
+    Salas ('sala:<id>') con alguna reserva que se superpone con [desde, hasta)
+    (ns). En cada sala el máximo acumulado de los fines no decrece: las
+    reservas con máximo <= desde son un prefijo del tramo y la primera que
+    sigue (su fin supera `desde`) solapa si empieza antes de `hasta`.
+    Una reserva de varios días no agranda la búsqueda.
+    """
+    idx = snap.derivado('salas_intervalos', indice_salas)
+    if not idx['salas'] or hasta <= desde:
+        return set()
+    terminadas = np.add.reduceat((idx['max_fin'] <= desde).astype(np.int64), idx['comienzos'])
+    quedan = np.flatnonzero(terminadas < idx['largos'])
+    ocupadas = quedan[idx['inicios'][idx['comienzos'][quedan] + terminadas[quedan]] < hasta]
+    return {idx['salas'][i] for i in ocupadas}
+
+
+def salas_libres(snap, indice: dict, capacidad: int, desde: int, hasta: int) -> list:
+    """Salas con capacidad >= `capacidad` sin reservas en [desde, hasta), de menor a mayor capacidad."""
+    lo = int(np.searchsorted(indice['capacidades'], capacidad, side='left')) if capacidad > 0 else 0
+    ocupadas = salas_ocupadas(snap, desde, hasta)
+    return [s for s, r in zip(indice['salas'][lo:], indice['recursos'][lo:]) if r not in ocupadas]
+
+
+def proximo_libre(snap, recurso: str, desde: int, duracion: int) -> int:
+    """
+    Primer instante >= desde (ns) en que el recurso queda libre `duracion`
+    ns seguidos. Se saltean con búsqueda binaria las reservas que terminan
+    antes de `desde` y se recorren las siguientes corriendo el inicio al
+    fin de cada una que no deja lugar.
+    """
+    intervalos = snap.derivado('intervalos', indice_intervalos).get(recurso)
+    if intervalos is None:
+        return desde
+    ini, fin = intervalos['inicios'], intervalos['fines']
+    t = desde
+    i = int(np.searchsorted(intervalos['max_fin'], t, side='right'))
+    while i < len(ini) and ini[i] < t + duracion:
+        t = max(t, int(fin[i]))
+        i += 1
+    return t
+
+
+def texto_instante(ns: int) -> str:
+    """Inverso de instante_param: ns a 'YYYY-MM-DDTHH:MM' (el formato de los inputs datetime-local)."""
+    return pd.Timestamp(ns).strftime('%Y-%m-%dT%H:%M')
+
+
+# ---------------------------
+#  Prediccion
+# ---------------------------
+
+def serie_diaria(inicios: pd.Series):
+    """Conteo diario de reservas por fecha de inicio (dias sin reservas en 0), o None."""
+    dias = inicios.dropna().dt.normalize()
+    if dias.empty:
+        return None
+
+    s = dias.value_counts().sort_index().rename(None)
+    s.index.name = None
+    full_idx = pd.date_range(start=s.index.min(), end=s.index.max(), freq='D')
+    return s.reindex(full_idx, fill_value=0).astype(float)
+
+
+def series_por_recurso(snap) -> pd.DataFrame:
+    """Conteo diario por recurso (una columna por sala/articulo) con un solo pivot."""
+    frame = snap.derivado('frame', frame_reservas)
+    datos = frame.loc[frame['inicio'].notna() & frame['recurso_id'].notna(), ['inicio', 'recurso_id']]
+    if datos.empty:
+        return pd.DataFrame()
+    pivot = pd.crosstab(datos['inicio'].dt.normalize(), datos['recurso_id'])
+    full_idx = pd.date_range(start=pivot.index.min(), end=pivot.index.max(), freq='D')
+    return pivot.reindex(full_idx, fill_value=0).astype(float)
+
+
+def nombres_recursos(snap) -> dict:
+    frame = snap.derivado('frame', frame_reservas)
+    datos = frame.loc[frame['recurso_id'].notna(), ['recurso_id', 'recurso']].drop_duplicates('recurso_id')
+    return dict(zip(datos['recurso_id'], datos['recurso'].astype(str)))
+
+
+def precargar():
+    """Importa statsmodels por adelantado (workers dedicados a prediccion)."""
+    importlib.import_module('statsmodels.tsa.arima.model')
+    importlib.import_module('statsmodels.tsa.stattools')
+
+
+def huella_serie(valores, prefijo: str = '') -> str:
+    """sha1 de prefijo + los valores de la serie como float64."""
+    h = hashlib.sha1(prefijo.encode())
+    h.update(np.ascontiguousarray(valores, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def historico(daily: pd.Series) -> dict:
+    """Salida sin proyeccion: solo la serie historica."""
+    return {
+        'hist_labels': [d.strftime("%Y-%m-%d") for d in daily.index],
+        'hist_vals': [float(v) for v in daily.values],
+        'fc_labels': [],
+        'fc_vals': [],
+        'ci_lower': [],
+        'ci_upper': [],
+    }
+
+
+def _proyeccion(daily: pd.Series, result, pasos_prediccion: int) -> dict:
+    salida = historico(daily)
+    fc = result.get_forecast(steps=pasos_prediccion)
+    fc_mean = fc.predicted_mean.clip(lower=0)
+    conf = fc.conf_int()
+    conf.iloc[:, 0] = conf.iloc[:, 0].clip(lower=0)
+    conf.iloc[:, 1] = conf.iloc[:, 1].clip(lower=0)
+
+    future_index = pd.date_range(start=daily.index[-1] + pd.Timedelta(days=1),
+                                 periods=pasos_prediccion, freq='D')
+    salida['fc_labels'] = [d.strftime("%Y-%m-%d") for d in future_index]
+    salida['fc_vals'] = [round(float(v), 2) for v in fc_mean.values]
+    salida['ci_lower'] = [round(float(v), 2) for v in conf.iloc[:, 0].values]
+    salida['ci_upper'] = [round(float(v), 2) for v in conf.iloc[:, 1].values]
+    return salida
+
+
+def ajustar_prediccion(daily: pd.Series, pasos_prediccion: int):
+    """
+    Ajuste completo: ADF para elegir d, ARIMA(5, d, 0) y proyeccion con IC 95%.
+    Devuelve (salida, estado); estado guarda d y los parametros estimados para
+    poder extender la serie despues sin volver a optimizar (None si ARIMA falla).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.stattools import adfuller
+
+    # ADF para d
+    try:
+        d_param = 1 if adfuller(daily.dropna())[1] > 0.05 else 0
+    except Exception:
+        d_param = 0
+
+    try:
+        model = ARIMA(daily.asfreq('D'), order=(5, d_param, 0))
+        result = model.fit()
+        salida = _proyeccion(daily, result, pasos_prediccion)
+    except Exception:
+        # Si falla ARIMA, solo mostramos histórico
+        return historico(daily), None
+    return salida, {'d': d_param, 'params': [float(p) for p in result.params]}
+
+
+def extender_prediccion(daily: pd.Series, pasos_prediccion: int, estado: dict) -> dict:
+    """
+    Proyeccion incremental: aplica los parametros de un ajuste anterior a la
+    serie con las observaciones nuevas (solo filtro de Kalman, sin optimizar),
+    equivalente a results.append(nuevas, refit=False).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    model = ARIMA(daily.asfreq('D'), order=(5, estado['d'], 0))
+    result = model.filter(np.asarray(estado['params']))
+    return _proyeccion(daily, result, pasos_prediccion)
+
+
+def ajustar_lote(series: dict, pasos_prediccion: int) -> dict:
+    """Ajuste completo de varias series en un mismo trabajo ({serie: (salida, estado)})."""
+    return {serie: ajustar_prediccion(daily, pasos_prediccion) for serie, daily in series.items()}
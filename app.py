@@ -1,34 +1,587 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, send_file
+from flask import before_render_template, template_rendered
+import codecs
+import importlib
 import json
+import hashlib
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, EmailField, SelectField
 from wtforms.validators import DataRequired, Email, Length
 import os
+import re
+import sys
+import tempfile
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from collections import Counter, OrderedDict
+from http import cookiejar
 import requests
-import pandas as pd
-import numpy as np
+from requests.adapters import HTTPAdapter
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.stattools import adfuller
+from functools import partial, wraps
+
+# Tiempo de carga del modulo y memoria del worker (ver estado_arranque)
+_inicio_import = time.perf_counter()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'tu-clave-secreta-aqui'
 
 BACKEND_BASE = os.environ.get('BACKEND_BASE', 'http://localhost:8080')
 
+# Pool de conexiones hacia el backend Java (se puede ajustar por variables de entorno)
+BACKEND_POOL_SIZE = int(os.environ.get('BACKEND_POOL_SIZE', '10'))
+BACKEND_KEEPALIVE = os.environ.get('BACKEND_KEEPALIVE', '1') != '0'
+BACKEND_TIMEOUT = float(os.environ.get('BACKEND_TIMEOUT', '6'))
+# Timeouts por endpoint (prefijo -> segundos); se puede extender con BACKEND_TIMEOUTS en formato JSON
+BACKEND_TIMEOUTS = {'/auth/logout': 4}
+BACKEND_TIMEOUTS.update(json.loads(os.environ.get('BACKEND_TIMEOUTS', '{}')))
+# Lecturas concurrentes (fan-out): hilos maximos y deadline total en segundos
+BACKEND_FANOUT_WORKERS = int(os.environ.get('BACKEND_FANOUT_WORKERS', '8'))
+BACKEND_FANOUT_DEADLINE = float(os.environ.get('BACKEND_FANOUT_DEADLINE', '8'))
+# Cortacircuitos por endpoint: fallos seguidos para abrir (0 desactiva) y segundos abierto
+BACKEND_CB_UMBRAL = int(os.environ.get('BACKEND_CB_UMBRAL', '5'))
+BACKEND_CB_ESPERA = float(os.environ.get('BACKEND_CB_ESPERA', '30'))
+# Tamaño de bloque al leer en streaming respuestas grandes (bytes)
+BACKEND_STREAM_CHUNK = int(os.environ.get('BACKEND_STREAM_CHUNK', str(64 * 1024)))
+# Cache de listas de referencia (iguales para todos los usuarios)
+# Pasado LISTAS_CACHE_TTL (blando) la lista se sirve igual y se refresca en segundo plano;
+# pasado LISTAS_CACHE_HARD_TTL (duro) se vuelve a pedir bloqueando la vista
+LISTAS_CACHE_TTL = float(os.environ.get('LISTAS_CACHE_TTL', '60'))
+LISTAS_CACHE_HARD_TTL = float(os.environ.get('LISTAS_CACHE_HARD_TTL', '600'))
+LISTAS_CACHE_MAX = int(os.environ.get('LISTAS_CACHE_MAX', '32'))
+# La lista de usuarios no va: solo la ve un admin y la cache no revisa roles
+LISTAS_CACHEABLES = ('/api/persona/listar', '/api/salas/listar', '/api/articulo/listar')
+# Las caches compartidas (listas y snapshot de reservas) solo se sirven a sesiones que el
+# backend aceptó en los ultimos SESION_VALIDA_TTL segundos; si no, se consulta SESION_VALIDACION_PATH
+SESION_VALIDA_TTL = float(os.environ.get('SESION_VALIDA_TTL', '30'))
+SESION_VALIDACION_PATH = os.environ.get('SESION_VALIDACION_PATH', '/api/salas/listar')
+SESIONES_VALIDAS_MAX = int(os.environ.get('SESIONES_VALIDAS_MAX', '4096'))
+# Indice username -> rol usado en el login
+ROLES_INDEX_TTL = float(os.environ.get('ROLES_INDEX_TTL', '300'))
+ROLES_INDEX_MIN_REFRESH = float(os.environ.get('ROLES_INDEX_MIN_REFRESH', '5'))
+# Snapshot de reservas compartido por reservas/reportes/prediccion
+RESERVAS_SNAPSHOT_INTERVAL = float(os.environ.get('RESERVAS_SNAPSHOT_INTERVAL', '30'))
+# Cache de predicciones ARIMA (en memoria y opcionalmente en disco)
+# Reportes: cada cuanto el navegador revisa /api/reportes/metricas (segundos)
+REPORTES_POLL_INTERVAL = int(os.environ.get('REPORTES_POLL_INTERVAL', '30'))
+# Tabla de reservas paginada en el servidor
+RESERVAS_PAGINA_DEFAULT = int(os.environ.get('RESERVAS_PAGINA_DEFAULT', '50'))
+RESERVAS_PAGINA_MAX = 500
+ORDENES_RESERVAS = ('id', 'inicio', 'fin', 'persona', 'recurso')
+# Disponibilidad: salas libres listadas como maximo por consulta
+DISPONIBILIDAD_MAX = int(os.environ.get('DISPONIBILIDAD_MAX', '200'))
+PREDICCION_CACHE_MAX = int(os.environ.get('PREDICCION_CACHE_MAX', '64'))
+PREDICCION_CACHE_DIR = os.environ.get('PREDICCION_CACHE_DIR', '')
+PREDICCION_PASOS = 14  # 14 días (cambialo si querés)
+PREDICCION_CLAVES = ('hist_labels', 'hist_vals', 'fc_labels', 'fc_vals', 'ci_lower', 'ci_upper')
+# Pool de procesos para ARIMA (0 workers = se calcula en el hilo del request)
+PREDICCION_WORKERS = int(os.environ.get('PREDICCION_WORKERS', '2'))
+PREDICCION_COLA_MAX = int(os.environ.get('PREDICCION_COLA_MAX', '8'))
+PREDICCION_DEADLINE = float(os.environ.get('PREDICCION_DEADLINE', '20'))
+# Actualizacion incremental: cada cuanto se fuerza un reajuste completo del modelo
+PREDICCION_REFIT_INTERVAL = float(os.environ.get('PREDICCION_REFIT_INTERVAL', '21600'))
+PREDICCION_ESTADOS_MAX = int(os.environ.get('PREDICCION_ESTADOS_MAX', '512'))
+# Precalculo en segundo plano (0 = desactivado) y credenciales de servicio opcionales
+PREDICCION_PRECALCULO_INTERVALO = float(os.environ.get('PREDICCION_PRECALCULO_INTERVALO', '300'))
+PREDICCION_PRECALCULO_DEADLINE = float(os.environ.get('PREDICCION_PRECALCULO_DEADLINE', '300'))
+BACKEND_SERVICE_USER = os.environ.get('BACKEND_SERVICE_USER', '')
+BACKEND_SERVICE_PASSWORD = os.environ.get('BACKEND_SERVICE_PASSWORD', '')
+# Carga anticipada de pandas/numpy/statsmodels (workers dedicados a reportes o prediccion)
+ANALYTICS_PRELOAD = os.environ.get('ANALYTICS_PRELOAD', '0') == '1'
+# /metrics (formato Prometheus): si hay token se exige "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Perfilador bajo demanda (admin): carpeta de perfiles, tope en MB e intervalo de muestreo (segundos)
+PROFILER_DIR = os.environ.get('PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'frontendpv-perfiles'))
+PROFILER_MAX_MB = float(os.environ.get('PROFILER_MAX_MB', '50'))
+PROFILER_INTERVALO = float(os.environ.get('PROFILER_INTERVALO', '0.005'))
+
+arranque = {'import_ms': None, 'analytics_ms': None}
+_analytics = {'modulo': None}
+_analytics_lock = threading.Lock()
+
+
+def analitica():
+    """
+    Modulo analytics (pandas, numpy, statsmodels), importado la primera vez
+    que se usa: los workers que solo sirven listas no pagan su carga.
+    Solo se publica ya importado del todo: los hilos que llegan durante la
+    primera carga esperan el lock en lugar de ver el modulo a medio iniciar.
+    """
+    modulo = _analytics['modulo']
+    if modulo is None:
+        with _analytics_lock:
+            modulo = _analytics['modulo']
+            if modulo is None:
+                ya_importado = 'analytics' in sys.modules
+                inicio = time.perf_counter()
+                modulo = importlib.import_module('analytics')
+                if not ya_importado:
+                    arranque['analytics_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+                _analytics['modulo'] = modulo
+    return modulo
+
+
+def precargar_analitica():
+    """Carga analytics y statsmodels por adelantado (p.ej. en post_worker_init de gunicorn)."""
+    analitica().precargar()
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as fh:
+            return round(int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def estado_arranque() -> dict:
+    """Tiempo de import de app.py, memoria actual y que parte del stack de analitica esta cargada."""
+    return dict(arranque,
+                rss_mb=_rss_mb(),
+                pandas=('pandas' in sys.modules),
+                statsmodels=('statsmodels' in sys.modules))
+
+
+def reporte_arranque() -> dict:
+    """
+    Importa app.py en interpretes nuevos, sin y con la analitica precargada,
+    y devuelve lo que mide cada uno (tiempo total de import y RSS).
+    """
+    import subprocess
+    codigo = ("import json, time; t = time.perf_counter(); import app; "
+              "app.precargar_analitica() if {precargar} else None; "
+              "print(json.dumps(dict(app.estado_arranque(), "
+              "total_ms=round((time.perf_counter() - t) * 1000, 1))))")
+    entorno = dict(os.environ, PREDICCION_PRECALCULO_INTERVALO='0', ANALYTICS_PRELOAD='0')
+    reporte = {}
+    for nombre, precargar in (('diferido', False), ('precargado', True)):
+        salida = subprocess.run([sys.executable, '-c', codigo.format(precargar=precargar)],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), env=entorno,
+                                capture_output=True, text=True, check=True).stdout
+        reporte[nombre] = json.loads(salida.strip().splitlines()[-1])
+    return reporte
+
+
 def backend_url(path: str) -> str:
 
     return f"{BACKEND_BASE.rstrip('/')}{path}"
 
 
+def backend_timeout(path: str) -> float:
+    """Devuelve el timeout configurado para el endpoint (gana el prefijo mas largo)."""
+    prefijos = [p for p in BACKEND_TIMEOUTS if path.startswith(p)]
+    if not prefijos:
+        return BACKEND_TIMEOUT
+    return float(BACKEND_TIMEOUTS[max(prefijos, key=len)])
+
+
+class _SinCookies(cookiejar.DefaultCookiePolicy):
+    """Evita que el cliente compartido guarde cookies: el JSESSIONID viaja por peticion."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+_cliente_lock = threading.Lock()
+_cliente = {'pid': None, 'session': None, 'peticiones': 0}
+
+
+def backend_client() -> requests.Session:
+    """
+    Cliente HTTP con pool de conexiones keep-alive, uno por proceso (worker).
+    Si el proceso se forkeo (gunicorn --preload) se crea un pool nuevo.
+    """
+    pid = os.getpid()
+    client = _cliente['session']
+    if client is not None and _cliente['pid'] == pid:
+        return client
+    with _cliente_lock:
+        if _cliente['session'] is None or _cliente['pid'] != pid:
+            client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=BACKEND_POOL_SIZE, pool_maxsize=BACKEND_POOL_SIZE)
+            client.mount('http://', adapter)
+            client.mount('https://', adapter)
+            client.cookies.set_policy(_SinCookies())
+            if not BACKEND_KEEPALIVE:
+                client.headers['Connection'] = 'close'
+            _cliente.update(pid=pid, session=client, peticiones=0)
+        return _cliente['session']
+
+
+class CircuitoAbierto(requests.ConnectionError):
+    """El circuito del endpoint está abierto: se falla sin tocar la red."""
+
+
+class CircuitBreaker:
+    """
+    Cortacircuitos por endpoint (método + path con ids normalizados).
+    Tras `umbral` fallos seguidos (error de red o HTTP 5xx) el circuito se
+    abre y las llamadas fallan al instante durante `espera` segundos; luego
+    pasa una sola llamada de prueba (semiabierto) que lo cierra o lo reabre.
+    """
+
+    CERRADO = 'cerrado'
+    ABIERTO = 'abierto'
+    SEMIABIERTO = 'semiabierto'
+
+    def __init__(self, umbral: int, espera: float):
+        self.umbral = umbral
+        self.espera = espera
+        self.rechazadas = 0
+        self._circuitos = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint(method: str, path: str) -> str:
+        partes = ['{id}' if parte.isdigit() else parte for parte in path.split('?', 1)[0].split('/')]
+        return f"{method.upper()} {'/'.join(partes)}"
+
+    def permitir(self, endpoint: str) -> bool:
+        if self.umbral <= 0:
+            return True
+        with self._lock:
+            c = self._circuitos.get(endpoint)
+            if c is None or c['estado'] == self.CERRADO:
+                return True
+            # Abierto (o una prueba que nunca informó) con la espera cumplida: pasa una prueba
+            if time.monotonic() - c['desde'] >= self.espera:
+                c['estado'] = self.SEMIABIERTO
+                c['desde'] = time.monotonic()
+                return True
+            self.rechazadas += 1
+            return False
+
+    def exito(self, endpoint: str):
+        with self._lock:
+            c = self._circuitos.get(endpoint)
+            if c is not None:
+                c['estado'] = self.CERRADO
+                c['fallos'] = 0
+
+    def fallo(self, endpoint: str):
+        if self.umbral <= 0:
+            return
+        with self._lock:
+            c = self._circuitos.setdefault(endpoint, {'estado': self.CERRADO, 'fallos': 0, 'desde': 0.0, 'aperturas': 0})
+            c['fallos'] += 1
+            if c['estado'] == self.SEMIABIERTO or c['fallos'] >= self.umbral:
+                if c['estado'] != self.ABIERTO:
+                    c['aperturas'] += 1
+                c['estado'] = self.ABIERTO
+                c['desde'] = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            circuitos = {
+                ep: {'estado': c['estado'], 'fallos': c['fallos'], 'aperturas': c['aperturas']}
+                for ep, c in self._circuitos.items()
+            }
+        return {
+            'umbral': self.umbral,
+            'espera': self.espera,
+            'rechazadas': self.rechazadas,
+            'circuitos': circuitos,
+        }
+
+
+circuit_breaker = CircuitBreaker(BACKEND_CB_UMBRAL, BACKEND_CB_ESPERA)
+
+
+# ---------------------------
+#  Instrumentacion (Server-Timing y /metrics)
+# ---------------------------
+
+class Histograma:
+    """
+    Histograma acumulativo al estilo Prometheus con una etiqueta opcional
+    (endpoint, ruta, template...). Los valores se cuentan en el primer
+    limite >= valor; exponer() devuelve las lineas en formato texto.
+    """
+
+    def __init__(self, nombre: str, ayuda: str, limites: tuple, etiqueta: str = None):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(sorted(limites))
+        self.etiqueta = etiqueta
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, etiqueta: str = ''):
+        with self._lock:
+            serie = self._series.get(etiqueta)
+            if serie is None:
+                serie = self._series[etiqueta] = {'conteos': [0] * (len(self.limites) + 1), 'suma': 0.0}
+            serie['conteos'][bisect_left(self.limites, valor)] += 1
+            serie['suma'] += valor
+
+    def _etiquetas(self, valor: str, le: str = None) -> str:
+        pares = []
+        if self.etiqueta:
+            valor = valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pares.append(f'{self.etiqueta}="{valor}"')
+        if le is not None:
+            pares.append(f'le="{le}"')
+        return '{' + ','.join(pares) + '}' if pares else ''
+
+    def exponer(self) -> list:
+        with self._lock:
+            series = {k: (list(v['conteos']), v['suma']) for k, v in self._series.items()}
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valor, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (None,), conteos):
+                acumulado += conteo
+                le = '+Inf' if limite is None else f'{limite:g}'
+                lineas.append(f"{self.nombre}_bucket{self._etiquetas(valor, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._etiquetas(valor)} {suma:.6f}")
+            lineas.append(f"{self.nombre}_count{self._etiquetas(valor)} {acumulado}")
+        return lineas
+
+
+_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+metricas = {
+    'request': Histograma('frontend_request_seconds', 'Duracion de cada request por ruta.', _SEGUNDOS, 'ruta'),
+    'llamadas': Histograma('frontend_backend_calls_per_request', 'Llamadas al backend por request.',
+                           (0, 1, 2, 3, 5, 8, 13, 21), 'ruta'),
+    'backend': Histograma('frontend_backend_seconds', 'Latencia de las llamadas al backend por endpoint.',
+                          _SEGUNDOS, 'endpoint'),
+    'bytes': Histograma('frontend_backend_response_bytes', 'Bytes de respuesta del backend por endpoint.',
+                        _BYTES, 'endpoint'),
+    'decode': Histograma('frontend_backend_decode_seconds', 'Decodificacion de JSON del backend por endpoint.',
+                         _SEGUNDOS, 'endpoint'),
+    'render': Histograma('frontend_render_seconds', 'Render de templates Jinja.', _SEGUNDOS, 'template'),
+    'forecast': Histograma('frontend_forecast_seconds', 'Prediccion ARIMA (cache, extension o ajuste).',
+                           _SEGUNDOS, 'modo'),
+}
+
+
+class Medicion:
+    """
+    Lo que costo un request: llamadas al backend y segundos por fase
+    (backend, decode, forecast, render). Los hilos del fan-out suman
+    sobre la misma medicion, por eso las fases pueden superar al total.
+    """
+
+    FASES = ('backend', 'decode', 'forecast', 'render')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.llamadas = 0
+        self.fases = {}
+        self._lock = threading.Lock()
+
+    def sumar(self, fase: str, segundos: float, llamada: bool = False):
+        with self._lock:
+            self.fases[fase] = self.fases.get(fase, 0.0) + segundos
+            if llamada:
+                self.llamadas += 1
+
+    def server_timing(self, total: float) -> str:
+        partes = []
+        for fase in self.FASES:
+            if fase in self.fases:
+                desc = f';desc="llamadas={self.llamadas}"' if fase == 'backend' else ''
+                partes.append(f"{fase};dur={self.fases[fase] * 1000:.1f}{desc}")
+        partes.append(f"app;dur={total * 1000:.1f}")
+        return ', '.join(partes)
+
+
+# Medicion del request en curso; el fan-out la propaga con copy_context()
+_medicion = ContextVar('medicion', default=None)
+
+
+def registrar_fase(fase: str, segundos: float, etiqueta: str = '', llamada: bool = False):
+    """Suma la fase al request en curso (si hay) y la observa en su histograma."""
+    metricas[fase].observar(segundos, etiqueta)
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.sumar(fase, segundos, llamada)
+
+
+@contextmanager
+def medir_fase(fase: str, etiqueta: str = ''):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_fase(fase, time.perf_counter() - inicio, etiqueta)
+
+
+def medido(fase: str, etiqueta: str = ''):
+    """Decorador: mide cada llamada a la funcion como `fase`."""
+    def decorador(f):
+        @wraps(f)
+        def envoltura(*args, **kwargs):
+            with medir_fase(fase, etiqueta):
+                return f(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def exponer_metricas() -> str:
+    lineas = []
+    for histograma in metricas.values():
+        lineas.extend(histograma.exponer())
+    return '\n'.join(lineas) + '\n'
+
+
+def backend_send(method: str, path: str, **kwargs):
+    """
+    Envia una peticion al backend usando el pool del worker. Si el circuito
+    del endpoint está abierto lanza CircuitoAbierto (un requests.ConnectionError)
+    sin esperar al socket, así las vistas toman su camino de error habitual.
+    """
+    endpoint = CircuitBreaker.endpoint(method, path)
+    if not circuit_breaker.permitir(endpoint):
+        raise CircuitoAbierto(f"Backend no disponible ({endpoint}), reintento en {BACKEND_CB_ESPERA:g}s")
+    kwargs.setdefault('timeout', backend_timeout(path))
+    client = backend_client()
+    with _cliente_lock:
+        _cliente['peticiones'] += 1
+    inicio = time.perf_counter()
+    try:
+        resp = client.request(method=method.upper(), url=backend_url(path), **kwargs)
+    except requests.RequestException:
+        circuit_breaker.fallo(endpoint)
+        registrar_fase('backend', time.perf_counter() - inicio, endpoint, llamada=True)
+        raise
+    # En streaming se mide hasta las cabeceras; bytes y lectura del cuerpo los registra quien lo consume
+    registrar_fase('backend', time.perf_counter() - inicio, endpoint, llamada=True)
+    if not kwargs.get('stream'):
+        metricas['bytes'].observar(len(resp.content), endpoint)
+    if resp.status_code >= 500:
+        circuit_breaker.fallo(endpoint)
+    elif not kwargs.get('stream'):
+        # En streaming el éxito lo informa quien lee el cuerpo (puede cortarse a mitad)
+        circuit_breaker.exito(endpoint)
+    sesion_id = (kwargs.get('cookies') or {}).get('JSESSIONID')
+    if sesion_id:
+        registrar_sesion(sesion_id, resp.status_code, path)
+    return resp
+
+
+_json_decoder = json.JSONDecoder()
+_JSON_ESPACIOS = ' \t\n\r'
+_JSON_NUMERO = '0123456789.eE+-'
+
+
+def iter_json_array(chunks, al_leer=None):
+    """
+    Itera los elementos de un array JSON a medida que llegan los bloques de
+    bytes (p. ej. resp.iter_content()), sin armar la lista completa.
+    al_leer(bloque) recibe cada bloque crudo (para calcular un hash).
+    Si el cuerpo no es un array se decodifica entero. Lanza ValueError si el
+    JSON es inválido.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    fin = False
+
+    def leer():
+        nonlocal buf, pos, fin
+        bloque = next(chunks, None)
+        if bloque is None:
+            fin = True
+            buf = buf[pos:] + utf8.decode(b'', final=True)
+        else:
+            if al_leer is not None:
+                al_leer(bloque)
+            buf = buf[pos:] + utf8.decode(bloque)
+        pos = 0
+
+    def saltar_espacios():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _JSON_ESPACIOS:
+                pos += 1
+            if pos < len(buf) or fin:
+                return
+            leer()
+
+    saltar_espacios()
+    if pos >= len(buf):
+        return
+    if buf[pos] != '[':
+        # No es un array: se decodifica completo como hacia resp.json()
+        while not fin:
+            leer()
+        data = json.loads(buf[pos:]) or []
+        yield from (data if isinstance(data, list) else [])
+        return
+    pos += 1
+    primero = True
+    while True:
+        saltar_espacios()
+        if pos >= len(buf):
+            raise ValueError('Array JSON incompleto')
+        if buf[pos] == ']':
+            return
+        if not primero:
+            if buf[pos] != ',':
+                raise ValueError(f'Se esperaba "," en la posición {pos}')
+            pos += 1
+            saltar_espacios()
+        # Un valor solo se acepta si lo sigue un caracter que no pueda ser
+        # parte de un número (1 de "1.5" podría seguir en el próximo bloque)
+        while True:
+            try:
+                valor, final = _json_decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if fin:
+                    raise
+                leer()
+                continue
+            if fin or (final < len(buf) and buf[final] not in _JSON_NUMERO):
+                break
+            leer()
+        pos = final
+        primero = False
+        yield valor
+
+
+def backend_pool_stats() -> dict:
+    """Estadisticas de reutilizacion de conexiones del pool del worker."""
+    adapter = backend_client().get_adapter(backend_url('/'))
+    conexiones = 0
+    peticiones = 0
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        conexiones += pool.num_connections
+        peticiones += pool.num_requests
+    return {
+        'pid': os.getpid(),
+        'pool_size': BACKEND_POOL_SIZE,
+        'keepalive': BACKEND_KEEPALIVE,
+        'peticiones': _cliente['peticiones'],
+        'conexiones_abiertas': conexiones,
+        'conexiones_reutilizadas': max(peticiones - conexiones, 0),
+    }
+
+
 def authenticate_backend(username: str, password: str):
 
-    login_url = backend_url('/auth/login')
     try:
-        resp = requests.post(
-            login_url,
+        resp = backend_send(
+            'POST',
+            '/auth/login',
             data={'username': username, 'password': password},
-            timeout=6,
         )
     except requests.RequestException as exc:
         return None, f"Error al contactar backend: {exc}"
@@ -59,13 +612,9 @@ def backend_request(method: str, path: str, **kwargs):
         cookies['JSESSIONID'] = session_id
 
     try:
-        resp = requests.request(
-            method=method.upper(),
-            url=backend_url(path),
-            cookies=cookies,
-            timeout=6,
-            **kwargs
-        )
+        resp = backend_send(method, path, cookies=cookies, **kwargs)
+        if method.upper() != 'GET':
+            invalidar_recurso(path)
         # Si el backend invalida la cookie eliminamos el valor almacenado
         if resp.status_code in (401, 403):
             session.pop('backend_session_id', None)
@@ -73,6 +622,747 @@ def backend_request(method: str, path: str, **kwargs):
     except requests.RequestException as exc:
         raise RuntimeError(f"Error al contactar backend: {exc}") from exc
 
+
+class TTLCache:
+    """
+    Cache en memoria con expiracion (TTL) y desalojo LRU por tamaño.
+    Cada invalidacion incrementa la generacion: un valor leido del backend
+    antes de una invalidacion no se guarda (evita pisar datos nuevos con viejos).
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generacion = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self.get_con_edad(key, default)[0]
+
+    def get_con_edad(self, key, default=None):
+        """Devuelve (valor, segundos desde que se guardó) o (default, None)."""
+        with self._lock:
+            item = self._datos.get(key)
+            ahora = time.monotonic()
+            if item is None or item[0] < ahora:
+                if item is not None:
+                    del self._datos[key]
+                self.misses += 1
+                return default, None
+            self._datos.move_to_end(key)
+            self.hits += 1
+            return item[1], ahora - item[2]
+
+    def edad(self, key):
+        """Segundos desde que se guardó key (None si no está), sin contar como acceso."""
+        with self._lock:
+            item = self._datos.get(key)
+        return time.monotonic() - item[2] if item is not None else None
+
+    def descartar(self, key):
+        with self._lock:
+            self._datos.pop(key, None)
+
+    def set(self, key, value, generacion: int = None):
+        with self._lock:
+            if generacion is not None and generacion != self.generacion:
+                return
+            ahora = time.monotonic()
+            self._datos[key] = (ahora + self.ttl, value, ahora)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, prefix: str = '') -> int:
+        with self._lock:
+            self.generacion += 1
+            claves = [k for k in self._datos if str(k).startswith(prefix)]
+            for k in claves:
+                del self._datos[k]
+            return len(claves)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._datos),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / total, 3) if total else None,
+            }
+
+
+listas_cache = TTLCache(LISTAS_CACHE_HARD_TTL, LISTAS_CACHE_MAX)
+sesiones_validas = TTLCache(SESION_VALIDA_TTL, SESIONES_VALIDAS_MAX)
+listas_revalidacion = {'servidas_viejas': 0, 'revalidaciones': 0, 'en_curso': set()}
+_revalidacion_lock = threading.Lock()
+
+
+def registrar_sesion(sesion_id: str, status: int, path: str):
+    """Anota si el backend aceptó o rechazó la sesión (habilita o corta sus lecturas de cache)."""
+    if status in (401, 403) or path.startswith('/auth/'):
+        sesiones_validas.descartar(sesion_id)
+    elif 200 <= status < 300:
+        sesiones_validas.set(sesion_id, True)
+
+
+def autorizar_cache(cookies: dict):
+    """
+    Antes de servir datos de una cache compartida: la sesión tiene que haber
+    tenido una respuesta 2xx del backend hace menos de SESION_VALIDA_TTL; si
+    no, se consulta SESION_VALIDACION_PATH. Devuelve (status, error): con
+    401/403 la vista cierra la sesión como en cualquier otra lectura. Si el
+    backend no responde no se puede verificar y se sirve la copia.
+    """
+    sesion_id = cookies.get('JSESSIONID')
+    if not sesion_id:
+        return 401, None
+    if sesiones_validas.get(sesion_id):
+        return 200, None
+    try:
+        resp = backend_send('GET', SESION_VALIDACION_PATH, cookies={'JSESSIONID': sesion_id})
+    except requests.RequestException as exc:
+        return None, f"Error al contactar backend: {exc}"
+    return resp.status_code, None
+
+
+def invalidar_recurso(path: str):
+    """
+    Invalida lo cacheado del recurso afectado por una escritura
+    (p.ej. PUT /api/salas/actualizar invalida /api/salas/listar).
+    """
+    partes = path.split('/')
+    if len(partes) > 2 and partes[1] == 'api':
+        listas_cache.invalidate(f"/api/{partes[2]}/")
+        if partes[2] == 'usuario':
+            roles_index.invalidate()
+        elif partes[2] == 'reservas':
+            reservas_snapshot.invalidate()
+            precalculo.despertar()
+
+
+class SingleFlight:
+    """
+    Agrupa lecturas GET idénticas concurrentes: el primer hilo llama al
+    backend y los que llegan mientras tanto esperan y reciben el mismo
+    resultado (o la misma excepción).
+    """
+
+    def __init__(self):
+        self.llamadas = 0
+        self.agrupadas = 0
+        self._vuelos = {}
+        self._lock = threading.Lock()
+
+    def hacer(self, clave, fn):
+        """Devuelve (resultado, compartido); compartido=True si lo obtuvo otro hilo."""
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[clave] = Future()
+                self.llamadas += 1
+            else:
+                self.agrupadas += 1
+        if not lider:
+            return vuelo.result(), True
+        try:
+            resultado = fn()
+        except BaseException as exc:
+            vuelo.set_exception(exc)
+            raise
+        else:
+            vuelo.set_result(resultado)
+            return resultado, False
+        finally:
+            with self._lock:
+                self._vuelos.pop(clave, None)
+
+    def stats(self) -> dict:
+        total = self.llamadas + self.agrupadas
+        return {
+            'llamadas': self.llamadas,
+            'agrupadas': self.agrupadas,
+            'en_curso': len(self._vuelos),
+            'ratio': round(self.agrupadas / total, 3) if total else 0.0,
+        }
+
+
+coalescer = SingleFlight()
+
+
+_fanout_executor = ThreadPoolExecutor(max_workers=BACKEND_FANOUT_WORKERS, thread_name_prefix='backend-fanout')
+
+
+def _backend_get_json(path: str, cookies: dict):
+    """
+    GET al backend fuera del contexto de Flask. Devuelve (status, data, error).
+    Lecturas iguales en curso se agrupan: por sesión, salvo las listas de
+    referencia que son iguales para todos los usuarios.
+    """
+    sesion = None if path in LISTAS_CACHEABLES else cookies.get('JSESSIONID')
+    resultado, compartido = coalescer.hacer(('GET', path, sesion), partial(_leer_json, path, cookies))
+    if compartido and sesion is None and resultado[0] in (401, 403):
+        # Expiró la sesión de quien hizo la llamada, no necesariamente la nuestra
+        return _leer_json(path, cookies)
+    return resultado
+
+
+def _leer_json(path: str, cookies: dict):
+    try:
+        resp = backend_send('GET', path, cookies=dict(cookies))
+    except requests.RequestException as exc:
+        return None, [], f"Error al contactar backend: {exc}"
+    data = []
+    if 200 <= resp.status_code < 300:
+        with medir_fase('decode', CircuitBreaker.endpoint('GET', path)):
+            try:
+                data = resp.json() or []
+            except ValueError:
+                data = []
+    return resp.status_code, data, None
+
+
+def revalidar_lista(path: str, cookies: dict):
+    """Refresca en segundo plano una lista que se sirvió vieja (una a la vez por path)."""
+    with _revalidacion_lock:
+        if path in listas_revalidacion['en_curso']:
+            return
+        listas_revalidacion['en_curso'].add(path)
+        listas_revalidacion['revalidaciones'] += 1
+    generacion = listas_cache.generacion
+
+    def tarea():
+        try:
+            status, data, _ = _backend_get_json(path, cookies)
+            if status is not None and 200 <= status < 300 and isinstance(data, list):
+                listas_cache.set(path, data, generacion)
+        finally:
+            with _revalidacion_lock:
+                listas_revalidacion['en_curso'].discard(path)
+
+    _fanout_executor.submit(tarea)
+
+
+def backend_lectura(path: str, cookies: dict):
+    """
+    Como _backend_get_json, pero sirve desde cache las listas de referencia
+    (stale-while-revalidate: vieja pero antes del TTL duro se sirve igual).
+    La copia compartida solo se entrega a sesiones que el backend aceptó
+    hace poco (autorizar_cache).
+    """
+    if path not in LISTAS_CACHEABLES:
+        return _backend_get_json(path, cookies)
+    data, edad = listas_cache.get_con_edad(path)
+    if data is not None:
+        status, error = autorizar_cache(cookies)
+        if status in (401, 403):
+            return status, [], error
+        if edad >= LISTAS_CACHE_TTL:
+            listas_revalidacion['servidas_viejas'] += 1
+            revalidar_lista(path, dict(cookies))
+        return 200, data, None
+    generacion = listas_cache.generacion
+    status, data, error = _backend_get_json(path, cookies)
+    if status is not None and 200 <= status < 300 and isinstance(data, list):
+        listas_cache.set(path, data, generacion)
+        # La respuesta pudo venir de la llamada agrupada de otra sesión
+        status_sesion, error_sesion = autorizar_cache(cookies)
+        if status_sesion in (401, 403):
+            return status_sesion, [], error_sesion
+    return status, data, error
+
+
+def backend_cookies() -> dict:
+    session_id = session.get('backend_session_id')
+    return {'JSESSIONID': session_id} if session_id else {}
+
+
+def backend_get(path: str):
+    """Lectura GET desde una vista (usa la cache de listas). Devuelve (status, data, error)."""
+    status, data, error = backend_lectura(path, backend_cookies())
+    if status in (401, 403):
+        session.pop('backend_session_id', None)
+    return status, data, error
+
+
+def edad_lista(path: str):
+    """Antigüedad en segundos (entera) de la lista cacheada, para mostrarla en la página."""
+    edad = listas_cache.edad(path)
+    return int(edad) if edad is not None else None
+
+
+class RolesIndex:
+    """
+    Indice username -> rol construido desde /api/usuario/listar.
+    Se reconstruye cuando vence el TTL o al crear usuarios; mientras tanto
+    el login resuelve el rol con una busqueda en un dict. Los refrescos
+    concurrentes se agrupan: quien llega con uno en curso espera su
+    resultado en lugar de seguir con datos viejos.
+    """
+
+    def __init__(self, ttl: float, min_refresh: float):
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.refrescos = 0
+        self._roles = {}
+        self._cargado_en = None
+        self._generacion = 0
+        self._vuelo = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def rol_de(u: dict) -> str:
+        roles = u.get('roles') or []
+        if isinstance(roles, list) and len(roles) > 0:
+            rol_nombre = roles[0].get('nombre') or 'ROLE_USER'
+        else:
+            rol_nombre = 'ROLE_USER'
+        # Guardamos rol sin prefijo
+        return rol_nombre.replace('ROLE_', '').lower()
+
+    def vigente(self) -> bool:
+        cargado = self._cargado_en
+        return cargado is not None and time.monotonic() - cargado < self.ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._generacion += 1
+            self._cargado_en = None
+
+    def refrescar(self, cookies: dict) -> bool:
+        """
+        Reconstruye el indice desde el backend, o espera al refresco que ya
+        esta en curso. True si el indice quedo cargado.
+        """
+        with self._lock:
+            vuelo = self._vuelo
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelo = Future()
+                generacion = self._generacion
+        if not lider:
+            return vuelo.result()
+        ok = False
+        try:
+            status, data, _ = _backend_get_json('/api/usuario/listar', cookies)
+            if status is not None and 200 <= status < 300 and isinstance(data, list):
+                roles = {u.get('username'): self.rol_de(u) for u in data if u.get('username')}
+                with self._lock:
+                    # Se reemplaza el dict completo: los lectores nunca ven un indice a medio armar
+                    self._roles = roles
+                    # Si hubo un invalidate mientras se descargaba, la lista puede no incluir el cambio
+                    if generacion == self._generacion:
+                        self._cargado_en = time.monotonic()
+                self.refrescos += 1
+                ok = True
+        finally:
+            with self._lock:
+                self._vuelo = None
+            vuelo.set_result(ok)
+        return ok
+
+    def resolver(self, username: str, cookies: dict):
+        """
+        Rol del usuario o None si no se pudo determinar (o el backend no lo
+        conoce). Solo se responde desde el dict con el indice vigente; vencido,
+        invalidado o sin el usuario se espera un refresco, asi un usuario
+        recien creado o un rol revocado no se resuelven con datos viejos.
+        """
+        cargado = self._cargado_en
+        if cargado is not None and time.monotonic() - cargado < self.ttl:
+            rol = self._roles.get(username)
+            if rol is not None:
+                return rol
+            # Recien cargado y sin el usuario: el backend no lo conoce (evita una descarga por login)
+            if time.monotonic() - cargado < self.min_refresh:
+                return None
+        # El segundo intento cubre un refresco que ya estaba en curso antes de un invalidate
+        for _ in range(2):
+            if not self.refrescar(cookies):
+                return None
+            if self.vigente():
+                break
+        return self._roles.get(username)
+
+    def stats(self) -> dict:
+        return {
+            'usuarios': len(self._roles),
+            'vigente': self.vigente(),
+            'refrescos': self.refrescos,
+            'ttl': self.ttl,
+        }
+
+
+roles_index = RolesIndex(ROLES_INDEX_TTL, ROLES_INDEX_MIN_REFRESH)
+
+
+def normalizar_reserva(res: dict) -> dict:
+    persona = res.get('persona') or {}
+    sala = res.get('sala') or {}
+    articulo = res.get('articulo') or {}
+    inicio = res.get('fechaHoraInicio')
+    fin = res.get('fechaHoraFin')
+    return {
+        'id': res.get('id'),
+        'persona': persona,
+        'sala': sala if sala else None,
+        'articulo': articulo if articulo else None,
+        'inicio': inicio,
+        'fin': fin,
+    }
+
+
+def compartir_anidados(records):
+    """
+    Reutiliza un mismo dict para personas, salas y artículos idénticos que
+    se repiten entre reservas, en vez de retener una copia por reserva.
+    """
+    vistos = {}
+    for res in records:
+        for campo, clave in (('persona', 'idPersona'), ('sala', 'idSala'), ('articulo', 'idArticulo')):
+            obj = res[campo]
+            if not obj:
+                continue
+            k = (campo, obj.get(clave))
+            previo = vistos.get(k)
+            if previo is None:
+                vistos[k] = obj
+            elif previo is not obj and previo == obj:
+                res[campo] = previo
+        yield res
+
+
+class Snapshot:
+    """
+    Foto inmutable de las reservas normalizadas. Inicio y fin parseados
+    (inicios/fines, datetime64 alineados con records) y el resto de las
+    estructuras derivadas se calculan al pedirlas.
+    """
+
+    def __init__(self, records: list, version: str):
+        self.records = records
+        self.version = version
+        self.cargado_en = time.monotonic()
+        self.fecha = datetime.now()
+        self._derivados = {}
+        self._lock = threading.RLock()
+
+    def edad(self) -> float:
+        return time.monotonic() - self.cargado_en
+
+    @property
+    def inicios(self):
+        """Inicio de cada reserva como datetime64 (NaT si no se pudo parsear)."""
+        return self.derivado('inicios', lambda snap: analitica().parse_fechas([res['inicio'] for res in snap.records]))
+
+    @property
+    def fines(self):
+        return self.derivado('fines', lambda snap: analitica().parse_fechas([res['fin'] for res in snap.records]))
+
+    def derivado(self, nombre: str, construir):
+        """Estructura calculada a partir de las reservas, una sola vez por snapshot."""
+        valor = self._derivados.get(nombre)
+        if valor is None:
+            with self._lock:
+                valor = self._derivados.get(nombre)
+                if valor is None:
+                    valor = construir(self)
+                    self._derivados[nombre] = valor
+        return valor
+
+
+class ReservasSnapshot:
+    """
+    Copia normalizada de /api/reservas/listar compartida por reservas(),
+    reportes() y prediccion(). Se descarga como mucho una vez por intervalo
+    en cada worker y se invalida al crear, borrar o actualizar reservas.
+    Una copia ya descargada solo se entrega a sesiones autorizadas
+    (autorizar_cache), así un 401 del backend sigue cerrando la sesión.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.actual = None
+        self.descargas = 0
+        self._generacion = 0
+        self._vigente_gen = None
+        self._lock = threading.Lock()
+
+    def vigente(self) -> bool:
+        snap = self.actual
+        return (snap is not None and self._vigente_gen == self._generacion
+                and snap.edad() < self.intervalo)
+
+    def invalidate(self):
+        self._generacion += 1
+
+    def _descargar(self, cookies: dict):
+        # En streaming: cada reserva se normaliza al llegar, sin guardar el
+        # cuerpo ni la lista cruda; el hash de version se calcula por bloques
+        try:
+            resp = backend_send('GET', '/api/reservas/listar', cookies=dict(cookies), stream=True)
+        except requests.RequestException as exc:
+            return None, None, f"Error al contactar backend: {exc}"
+        endpoint = CircuitBreaker.endpoint('GET', '/api/reservas/listar')
+        with resp:
+            if not 200 <= resp.status_code < 300:
+                if resp.status_code < 500:
+                    circuit_breaker.exito(endpoint)
+                return resp.status_code, None, None
+            huella = hashlib.sha1()
+            leidos = [0]
+
+            def al_leer(bloque):
+                huella.update(bloque)
+                leidos[0] += len(bloque)
+
+            # decode incluye la lectura del cuerpo: llega y se parsea por bloques
+            try:
+                with medir_fase('decode', endpoint):
+                    reservas = iter_json_array(resp.iter_content(BACKEND_STREAM_CHUNK), al_leer)
+                    records = list(compartir_anidados(normalizar_reserva(res) for res in reservas))
+            except ValueError:
+                records = []
+            except requests.RequestException as exc:
+                # El backend cortó a mitad del cuerpo: cuenta como fallo del endpoint
+                circuit_breaker.fallo(endpoint)
+                return None, None, f"Error al contactar backend: {exc}"
+            circuit_breaker.exito(endpoint)
+            metricas['bytes'].observar(leidos[0], endpoint)
+        return resp.status_code, Snapshot(records, huella.hexdigest()[:16]), None
+
+    def obtener(self, cookies: dict):
+        """Devuelve (status, snapshot, error); snapshot es None si no se pudo descargar."""
+        if not self.vigente():
+            with self._lock:
+                # Otro hilo pudo haberlo refrescado mientras esperabamos el lock
+                if not self.vigente():
+                    generacion = self._generacion
+                    status, snap, error = self._descargar(cookies)
+                    if snap is not None:
+                        self.descargas += 1
+                        self.actual = snap
+                        self._vigente_gen = generacion
+                    return status, snap, error
+        snap = self.actual
+        status, error = autorizar_cache(cookies)
+        if status in (401, 403):
+            return status, None, error
+        return 200, snap, None
+
+    def stats(self) -> dict:
+        snap = self.actual
+        return {
+            'version': snap.version if snap else None,
+            'reservas': len(snap.records) if snap else 0,
+            'edad': round(snap.edad(), 1) if snap else None,
+            'vigente': self.vigente(),
+            'descargas': self.descargas,
+            'intervalo': self.intervalo,
+        }
+
+
+reservas_snapshot = ReservasSnapshot(RESERVAS_SNAPSHOT_INTERVAL)
+
+
+def pagina_reservas(snap: Snapshot, args) -> dict:
+    """
+    Una página de la tabla de reservas con filtros (persona, sala, articulo,
+    desde, hasta) y orden (sort/dir). Los filtros se resuelven con los índices
+    del snapshot; solo las filas de la página se convierten a dict.
+    """
+    try:
+        size = min(max(int(args.get('size', RESERVAS_PAGINA_DEFAULT)), 1), RESERVAS_PAGINA_MAX)
+    except ValueError:
+        size = RESERVAS_PAGINA_DEFAULT
+    try:
+        page = max(int(args.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    sort = args.get('sort', '')
+    if sort not in ORDENES_RESERVAS:
+        sort = ''
+    desc = args.get('dir') == 'desc'
+
+    filtros = {campo: args.get(campo) for campo in ('persona', 'sala', 'articulo', 'desde', 'hasta') if args.get(campo)}
+    if sort or filtros:
+        orden, filtros = analitica().posiciones_reservas(snap, sort, desc, filtros)
+    else:
+        # Orden del backend y sin filtros: no hace falta armar columnas
+        n = len(snap.records)
+        orden = range(n - 1, -1, -1) if desc else range(n)
+
+    total = len(orden)
+    pages = max((total + size - 1) // size, 1)
+    page = min(page, pages)
+    filas = [snap.records[i] for i in orden[(page - 1) * size:page * size]]
+    return {
+        'reservas': filas,
+        'total': total,
+        'page': page,
+        'pages': pages,
+        'size': size,
+        'sort': sort,
+        'dir': 'desc' if desc else 'asc',
+        'filtros': filtros,
+    }
+
+
+def conflictos_reserva(payload: dict, excluir=None):
+    """
+    Ids de las reservas del snapshot que se superponen con la del formulario
+    en la misma sala o artículo. None si no se puede verificar (sin snapshot
+    o fechas que no se entienden): en ese caso decide el backend.
+    """
+    recurso = analitica().id_recurso(payload)
+    desde = analitica().instante_param(payload['fechaHoraInicio'])
+    hasta = analitica().instante_param(payload['fechaHoraFin'])
+    if recurso is None or desde is None or hasta is None:
+        return None
+    _, snap, _ = reservas_snapshot.obtener(backend_cookies())
+    if snap is None:
+        return None
+    return analitica().solapadas(snap, recurso, desde, hasta, excluir)
+
+
+def mensaje_conflictos(payload: dict, ids: list) -> str:
+    recurso = 'La sala ya está reservada' if payload['sala'] else 'El artículo ya está reservado'
+    listado = ', '.join(str(i) for i in ids[:10]) + (f' y {len(ids) - 10} más' if len(ids) > 10 else '')
+    return f'{recurso} en ese horario (reservas {listado})'
+
+
+def normalizar_sala(s: dict) -> dict:
+    sid = s.get('idSala') or s.get('id') or s.get('id_sala')
+    nombre = s.get('nombre') or s.get('name') or f"Sala {sid}"
+    capacidad = s.get('Capacidad')
+    if capacidad is None:
+        capacidad = s.get('capacidad')  # por si viene en minúsculas
+    try:
+        capacidad = int(capacidad) if capacidad is not None else None
+    except (TypeError, ValueError):
+        capacidad = None
+    return {'id': sid, 'name': nombre, 'capacidad': capacidad}
+
+
+# Salas ordenadas por capacidad para la lista de salas que está en cache (se rehace al cambiar la lista)
+_indice_salas = {'actual': (None, None)}
+
+
+def indice_capacidad_salas(data: list) -> dict:
+    lista, indice = _indice_salas['actual']
+    if lista is not data:
+        indice = analitica().indice_capacidad([normalizar_sala(s) for s in data])
+        _indice_salas['actual'] = (data, indice)
+    return indice
+
+
+def _entero(valor, defecto):
+    """int(valor), `defecto` si viene vacío o None si no es un número."""
+    if not valor:
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        return None
+
+
+def buscar_disponibilidad(snap: Snapshot, salas_data: list, args) -> dict:
+    """
+    Consulta de /disponibilidad. Con inicio, fin y capacidad: salas libres en
+    la ventana con al menos esa capacidad. Con sala, duracion (minutos) y
+    desde (por defecto ahora): el próximo hueco libre de la sala. Cada parte
+    se responde si vienen sus parámetros; los errores van en 'errores'.
+    """
+    t0 = time.perf_counter()
+    a = analitica()
+    indice = indice_capacidad_salas(salas_data)
+    resultado = {
+        'params': {k: args.get(k, '') for k in ('inicio', 'fin', 'capacidad', 'sala', 'duracion', 'desde')},
+        'errores': [],
+        'libres': None,
+        'total_libres': 0,
+        'proximo': None,
+    }
+    errores = resultado['errores']
+
+    if args.get('inicio') or args.get('fin'):
+        desde = a.instante_param(args.get('inicio'))
+        hasta = a.instante_param(args.get('fin'))
+        capacidad = _entero(args.get('capacidad'), 0)
+        if desde is None or hasta is None:
+            errores.append('Indicá un inicio y un fin válidos')
+        elif hasta <= desde:
+            errores.append('El fin debe ser posterior al inicio')
+        elif capacidad is None or capacidad < 0:
+            errores.append('La capacidad debe ser un número entero positivo')
+        else:
+            libres = a.salas_libres(snap, indice, capacidad, desde, hasta)
+            resultado['total_libres'] = len(libres)
+            resultado['libres'] = libres[:DISPONIBILIDAD_MAX]
+
+    if args.get('sala'):
+        sala = indice['por_id'].get(args['sala'])
+        duracion = _entero(args.get('duracion'), 60)
+        desde = a.instante_param(args.get('desde') or datetime.now().isoformat(timespec='minutes'))
+        if sala is None:
+            errores.append(f"La sala {args['sala']} no existe")
+        elif duracion is None or duracion <= 0:
+            errores.append('La duración debe ser una cantidad de minutos mayor a cero')
+        elif desde is None:
+            errores.append('La fecha desde no es válida')
+        else:
+            largo = duracion * 60 * 10 ** 9
+            libre = a.proximo_libre(snap, f"sala:{sala['id']}", desde, largo)
+            resultado['proximo'] = {'sala': sala, 'inicio': a.texto_instante(libre),
+                                    'fin': a.texto_instante(libre + largo)}
+
+    resultado['duracion_ms'] = round((time.perf_counter() - t0) * 1000, 2)
+    return resultado
+
+
+def backend_fetch_many(paths: dict, deadline: float = None) -> dict:
+    """
+    Ejecuta en paralelo lecturas GET independientes ({clave: path}).
+    Devuelve {clave: (status, data, error)}. Si una lectura falla o no termina
+    antes del deadline total queda con status None y data vacia.
+    En lugar de un path se puede pasar una funcion f(cookies) que devuelva
+    la misma tupla (p.ej. reservas_snapshot.obtener, con el snapshot como data).
+    """
+    deadline = BACKEND_FANOUT_DEADLINE if deadline is None else deadline
+    cookies = backend_cookies()
+    futuros = {}
+    for clave, path in paths.items():
+        # Cada tarea corre en una copia del contexto para sumar a la medicion del request
+        if callable(path):
+            futuros[clave] = _fanout_executor.submit(copy_context().run, path, cookies)
+        else:
+            futuros[clave] = _fanout_executor.submit(copy_context().run, backend_lectura, path, cookies)
+
+    limite = time.monotonic() + deadline
+    resultados = {}
+    for clave, futuro in futuros.items():
+        try:
+            resultados[clave] = futuro.result(timeout=max(limite - time.monotonic(), 0))
+        except FutureTimeout:
+            futuro.cancel()
+            resultados[clave] = (None, [], 'Tiempo de espera agotado')
+        except Exception as exc:
+            resultados[clave] = (None, [], str(exc))
+
+    # Igual que backend_request: si el backend invalida la cookie la descartamos
+    if any(status in (401, 403) for status, _, _ in resultados.values()):
+        session.pop('backend_session_id', None)
+    return resultados
+
 # Forms
 class LoginForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -111,6 +1401,325 @@ def login_required(admin_only=False):
     return decorator
 
 
+# ---------------------------
+#  Medicion por request
+# ---------------------------
+
+@app.before_request
+def iniciar_medicion():
+    g.medicion = Medicion()
+    _medicion.set(g.medicion)
+
+
+@before_render_template.connect_via(app)
+def _inicio_render(sender, template, context, **extra):
+    g.setdefault('renders', []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def _fin_render(sender, template, context, **extra):
+    renders = g.get('renders')
+    if renders:
+        registrar_fase('render', time.perf_counter() - renders.pop(), template.name or '')
+
+
+@app.after_request
+def cerrar_medicion(response):
+    """Agrega Server-Timing y observa la duracion y las llamadas del request."""
+    medicion = g.get('medicion')
+    if medicion is None:
+        return response
+    total = time.perf_counter() - medicion.inicio
+    ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    metricas['request'].observar(total, ruta)
+    metricas['llamadas'].observar(medicion.llamadas, ruta)
+    response.headers['Server-Timing'] = medicion.server_timing(total)
+    return response
+
+
+@app.teardown_request
+def descartar_medicion(exc):
+    _medicion.set(None)
+
+
+# ---------------------------
+#  Perfilador bajo demanda
+# ---------------------------
+
+def pila_colapsada(frame) -> str:
+    """Pila del frame en formato colapsado (raiz;...;hoja) para flamegraphs."""
+    marcos = []
+    while frame is not None:
+        code = frame.f_code
+        marcos.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(marcos))
+
+
+class Captura:
+    """
+    Perfil de un request en curso. Siempre muestrea la pila del hilo del
+    request con sys._current_frames() cada `intervalo` segundos; en modo
+    'cprofile' además registra cada llamada (más preciso, más costoso).
+    """
+
+    def __init__(self, modo: str, intervalo: float):
+        self.modo = modo
+        self.inicio = time.perf_counter()
+        self.muestras = Counter()
+        self._perfil = None
+        if modo == 'cprofile':
+            import cProfile
+            self._perfil = cProfile.Profile()
+            # ValueError si ya hay otro profiler activo en el proceso
+            self._perfil.enable()
+        self._objetivo = threading.get_ident()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, args=(intervalo,), name='perfilador', daemon=True)
+        self._hilo.start()
+
+    def _muestrear(self, intervalo: float):
+        while not self._parar.wait(intervalo):
+            frame = sys._current_frames().get(self._objetivo)
+            if frame is not None:
+                self.muestras[pila_colapsada(frame)] += 1
+
+    def terminar(self):
+        """Detiene la captura; devuelve (duracion, top de funciones, pstats o None)."""
+        if self._perfil is not None:
+            self._perfil.disable()
+        self._parar.set()
+        self._hilo.join()
+        duracion = time.perf_counter() - self.inicio
+        if self._perfil is None:
+            return duracion, self._top_muestras(), None
+        import pstats
+        stats = pstats.Stats(self._perfil)
+        return duracion, self._top_cprofile(stats), stats
+
+    def _top_muestras(self, n: int = 40) -> list:
+        total = sum(self.muestras.values()) or 1
+        propio = Counter()
+        acumulado = Counter()
+        for pila, cuenta in self.muestras.items():
+            marcos = pila.split(';')
+            propio[marcos[-1]] += cuenta
+            for marco in set(marcos):
+                acumulado[marco] += cuenta
+        return [{'funcion': f, 'propio': propio[f], 'total': acumulado[f],
+                 'propio_pct': round(propio[f] * 100 / total, 1), 'total_pct': round(acumulado[f] * 100 / total, 1)}
+                for f, _ in sorted(acumulado.items(), key=lambda x: (propio[x[0]], x[1]), reverse=True)[:n]]
+
+    @staticmethod
+    def _top_cprofile(stats, n: int = 40) -> list:
+        filas = sorted(stats.stats.items(), key=lambda x: x[1][2], reverse=True)[:n]
+        return [{'funcion': f"{func} ({os.path.basename(archivo)}:{linea})", 'llamadas': nc,
+                 'propio_ms': round(tt * 1000, 2), 'total_ms': round(ct * 1000, 2)}
+                for (archivo, linea, func), (cc, nc, tt, ct, _) in filas]
+
+
+class Perfilador:
+    """
+    Perfiles de requests pedidos por un admin: el próximo request, los de
+    una ruta, o uno de cada N. Sin plan armado el costo por request es
+    mirar un atributo. Cada perfil se guarda en `directorio` como
+    <id>.json (datos y top de funciones), <id>.txt (pilas colapsadas) y
+    <id>.prof (solo cprofile, para pstats/snakeviz); se borran los más
+    viejos cuando la carpeta supera `max_mb`.
+    """
+
+    MODOS = ('muestreo', 'cprofile')
+
+    def __init__(self, directorio: str, max_mb: float, intervalo: float):
+        self.directorio = directorio
+        self.max_bytes = int(max_mb * 2 ** 20)
+        self.intervalo = intervalo
+        self.plan = None
+        self.capturados = 0
+        self.omitidos = 0
+        self._en_curso = False
+        self._lock = threading.Lock()
+
+    def armar(self, ruta: str = None, modo: str = 'muestreo', cada: int = 1, cantidad: int = 1):
+        self.plan = {
+            'ruta': ruta or None,
+            'modo': modo if modo in self.MODOS else 'muestreo',
+            'cada': max(cada, 1),
+            'restantes': max(cantidad, 1),
+            'vistos': 0,
+        }
+
+    def desarmar(self):
+        self.plan = None
+
+    def corresponde(self, ruta: str):
+        """Modo con el que perfilar este request segun el plan, o None."""
+        plan = self.plan
+        if plan is None or ruta.startswith('/admin/perfiles') or ruta.startswith('/static'):
+            return None
+        if plan['ruta'] and plan['ruta'] != ruta:
+            return None
+        with self._lock:
+            if self.plan is not plan or plan['restantes'] <= 0:
+                return None
+            plan['vistos'] += 1
+            if plan['vistos'] % plan['cada']:
+                return None
+            plan['restantes'] -= 1
+            if plan['restantes'] <= 0:
+                self.plan = None
+            return plan['modo']
+
+    def iniciar(self, modo: str):
+        """Empieza una captura, o None si ya hay otra en curso (una por proceso)."""
+        with self._lock:
+            if self._en_curso:
+                self.omitidos += 1
+                return None
+            self._en_curso = True
+        try:
+            return Captura(modo, self.intervalo)
+        except ValueError:
+            with self._lock:
+                self._en_curso = False
+                self.omitidos += 1
+            return None
+
+    def terminar(self, captura: Captura, perfil_id: str, datos: dict):
+        try:
+            duracion, top, stats = captura.terminar()
+        finally:
+            with self._lock:
+                self._en_curso = False
+        datos = dict(datos, id=perfil_id, modo=captura.modo, fecha=datetime.now().isoformat(timespec='seconds'),
+                     duracion_ms=round(duracion * 1000, 1), muestras=sum(captura.muestras.values()),
+                     intervalo_ms=self.intervalo * 1000, top=top)
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            base = os.path.join(self.directorio, perfil_id)
+            with open(base + '.txt', 'w', encoding='utf-8') as fh:
+                fh.writelines(f"{pila} {cuenta}\n" for pila, cuenta in captura.muestras.most_common())
+            if stats is not None:
+                stats.dump_stats(base + '.prof')
+            with open(base + '.json.tmp', 'w', encoding='utf-8') as fh:
+                json.dump(datos, fh)
+            os.replace(base + '.json.tmp', base + '.json')
+            self.capturados += 1
+            self._podar_disco()
+        except OSError as exc:
+            print(f"No se pudo guardar el perfil {perfil_id}: {exc}")
+
+    def _podar_disco(self):
+        # Se borran perfiles completos (sus tres archivos), del más viejo al más nuevo
+        # (otro worker puede estar podando el mismo directorio: un archivo que ya no está se ignora)
+        perfiles = {}
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                tam = os.path.getsize(ruta)
+            except OSError:
+                continue
+            perfiles.setdefault(nombre.split('.', 1)[0], []).append((ruta, tam))
+        total = sum(tam for archivos in perfiles.values() for _, tam in archivos)
+        for perfil_id in sorted(perfiles):
+            if total <= self.max_bytes:
+                break
+            for ruta, tam in perfiles[perfil_id]:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+                total -= tam
+
+    def archivo(self, perfil_id: str, extension: str):
+        """Ruta del archivo del perfil, o None si el id no es valido o no existe."""
+        if not re.fullmatch(r'[0-9a-f-]+', perfil_id or ''):
+            return None
+        ruta = os.path.join(self.directorio, f"{perfil_id}.{extension}")
+        return ruta if os.path.exists(ruta) else None
+
+    def obtener(self, perfil_id: str):
+        ruta = self.archivo(perfil_id, 'json')
+        if ruta is None:
+            return None
+        try:
+            with open(ruta, encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def pilas(self, perfil_id: str, limite: int = 50) -> list:
+        """Primeras pilas colapsadas del perfil ([] si el archivo ya no está)."""
+        ruta = self.archivo(perfil_id, 'txt')
+        if ruta is None:
+            return []
+        try:
+            with open(ruta, encoding='utf-8') as fh:
+                return [linea.rstrip('\n') for _, linea in zip(range(limite), fh)]
+        except OSError:
+            return []
+
+    def listar(self) -> list:
+        try:
+            nombres = [f[:-5] for f in os.listdir(self.directorio) if f.endswith('.json')]
+        except OSError:
+            return []
+        perfiles = [p for p in (self.obtener(n) for n in nombres) if p is not None]
+        for p in perfiles:
+            p.pop('top', None)
+        return sorted(perfiles, key=lambda p: p['id'], reverse=True)
+
+    def stats(self) -> dict:
+        return {
+            'plan': dict(self.plan) if self.plan else None,
+            'capturados': self.capturados,
+            'omitidos': self.omitidos,
+            'en_curso': self._en_curso,
+            'directorio': self.directorio,
+        }
+
+
+perfilador = Perfilador(PROFILER_DIR, PROFILER_MAX_MB, PROFILER_INTERVALO)
+
+
+@app.before_request
+def iniciar_perfil():
+    # Sin plan ni ?perfilar= no se hace nada mas
+    modo = None
+    if perfilador.plan is not None and request.url_rule is not None:
+        modo = perfilador.corresponde(request.url_rule.rule)
+    if modo is None and 'perfilar' in request.args and is_admin():
+        modo = request.args['perfilar'] if request.args['perfilar'] in Perfilador.MODOS else 'muestreo'
+    if modo is None:
+        return
+    captura = perfilador.iniciar(modo)
+    if captura is not None:
+        g.perfil = captura
+        g.perfil_id = f"{datetime.now():%Y%m%d-%H%M%S}-{os.urandom(3).hex()}"
+
+
+@app.after_request
+def marcar_perfil(response):
+    if g.get('perfil') is not None:
+        g.perfil_status = response.status_code
+        response.headers['X-Perfil'] = g.perfil_id
+    return response
+
+
+@app.teardown_request
+def guardar_perfil(exc):
+    captura = g.pop('perfil', None)
+    if captura is None:
+        return
+    perfilador.terminar(captura, g.perfil_id, {
+        'ruta': request.url_rule.rule if request.url_rule else None,
+        'path': request.full_path.rstrip('?'),
+        'metodo': request.method,
+        'status': g.get('perfil_status', 500),
+        'usuario': session.get('user'),
+    })
+
+
 @app.route('/')
 def index():
     return redirect(url_for('login'))
@@ -143,25 +1752,9 @@ def login():
         session['user_name'] = username
 
 
+        # Rol desde el indice username -> rol (sin descargar la lista completa en cada login)
         try:
-            resp = backend_request('GET', '/api/usuario/listar')
-            if resp.status_code == 200:
-                data = resp.json()
-                # Buscar el usuario logueado en la lista
-                for u in data:
-                    if u.get('username') == username:
-                        roles = u.get('roles') or []
-                        if isinstance(roles, list) and len(roles) > 0:
-                            rol_nombre = roles[0].get('nombre') or 'ROLE_USER'
-                        else:
-                            rol_nombre = 'ROLE_USER'
-                        # Guardamos rol sin prefijo
-                        session['user_role'] = rol_nombre.replace('ROLE_', '').lower()
-                        break
-                else:
-                    session['user_role'] = 'user'
-            else:
-                session['user_role'] = 'user'
+            session['user_role'] = roles_index.resolver(username, backend_cookies()) or 'user'
         except Exception as exc:
             print(f"Error obteniendo roles del backend: {exc}")
             session['user_role'] = 'user'
@@ -190,10 +1783,9 @@ def users():
     (campo 'roles' o 'rol', según formato del JSON).
     """
     try:
-        # Llamada al backend Java
-        resp = backend_request('GET', '/api/usuario/listar')
-        if resp.status_code == 200:
-            data = resp.json()
+        # Llamada al backend Java (sin cache compartida: la lista es solo para admin)
+        status, data, error = backend_get('/api/usuario/listar')
+        if status == 200:
             if isinstance(data, list):
                 users_list = []
                 for u in data:
@@ -220,10 +1812,12 @@ def users():
                 return render_template('users.html', users=users_list, source='backend')
 
         # Si la sesión expira, se limpia y se redirige al login
-        elif resp.status_code in (401, 403):
+        elif status in (401, 403):
             flash('La sesión con el backend expiró. Inicia sesión nuevamente.', 'error')
             session.pop('backend_session_id', None)
             return redirect(url_for('logout'))
+        elif error:
+            raise RuntimeError(error)
 
     except Exception as exc:
         flash(f"Error al obtener usuarios: {exc}", "error")
@@ -283,12 +1877,8 @@ def add_user():
 def products():
     # Try to fetch products from Java backend /api/articulo/listar
     try:
-        resp = backend_request('GET', '/api/articulo/listar')
-        if resp.status_code == 200:
-            try:
-                data = resp.json()
-            except ValueError:
-                data = None
+        status, data, error = backend_get('/api/articulo/listar')
+        if status == 200:
             if isinstance(data, list):
                 products_list = []
                 for a in data:
@@ -307,11 +1897,14 @@ def products():
                         'description': description,
                         'available': disponible
                     })
-                return render_template('products.html', products=products_list, source='backend')
-        elif resp.status_code in (401, 403):
+                return render_template('products.html', products=products_list, source='backend',
+                                       edad=edad_lista('/api/articulo/listar'))
+        elif status in (401, 403):
             flash('La sesion con el backend expiro. Inicia sesion otra vez.', 'error')
             session.pop('backend_session_id', None)
             return redirect(url_for('logout'))
+        elif error:
+            raise RuntimeError(error)
     except RuntimeError as exc:
         print(f"Backend request error: {exc}")
     except Exception as exc:
@@ -407,11 +2000,7 @@ def logout():
     backend_session = session.get('backend_session_id')
     if backend_session:
         try:
-            requests.post(
-                backend_url('/auth/logout'),
-                cookies={'JSESSIONID': backend_session},
-                timeout=4
-            )
+            backend_send('POST', '/auth/logout', cookies={'JSESSIONID': backend_session})
         except requests.RequestException as exc:
             print(f'Backend logout error: {exc}')
     session.clear()
@@ -426,60 +2015,45 @@ def logout():
 @login_required()
 def reservas():
     """Vista principal de reservas: lista existentes y muestra formulario de creación."""
-    reservas_list = []
-    personas = []
-    salas = []
-    articulos = []
-    # 1) Traer reservas
-    try:
-        r = backend_request('GET', '/api/reservas/listar')
-        if 200 <= r.status_code < 300:
-            try:
-                data = r.json() or []
-            except ValueError:
-                data = []
-            for res in data:
-                rid = res.get('id')
-                persona = res.get('persona') or {}
-                sala = res.get('sala') or {}
-                articulo = res.get('articulo') or {}
-                reservas_list.append({
-                    'id': rid,
-                    'persona': persona,
-                    'sala': sala if sala else None,
-                    'articulo': articulo if articulo else None,
-                    'inicio': res.get('fechaHoraInicio'),
-                    'fin': res.get('fechaHoraFin')
-                })
-        elif r.status_code in (401, 403):
-            flash('Sesión expirada en backend. Vuelve a iniciar sesión.', 'error')
-            return redirect(url_for('logout'))
-        else:
-            flash(f'No se pudieron obtener reservas (HTTP {r.status_code})', 'error')
-    except Exception as exc:
-        flash(f'Error consultando reservas: {exc}', 'error')
-
-    # 2) Traer datos para selects (si falla, se deja vacío)
-    try:
-        pr = backend_request('GET', '/api/persona/listar')
-        if 200 <= pr.status_code < 300:
-            personas = pr.json() or []
-    except Exception:
-        personas = []
-    try:
-        sr = backend_request('GET', '/api/salas/listar')
-        if 200 <= sr.status_code < 300:
-            salas = sr.json() or []
-    except Exception:
-        salas = []
-    try:
-        ar = backend_request('GET', '/api/articulo/listar')
-        if 200 <= ar.status_code < 300:
-            articulos = ar.json() or []
-    except Exception:
-        articulos = []
-
-    return render_template('reservas.html', reservas=reservas_list, personas=personas, salas=salas, articulos=articulos)
+    # Las cuatro lecturas son independientes: se piden en paralelo
+    lecturas = backend_fetch_many({
+        'reservas': reservas_snapshot.obtener,
+        'personas': '/api/persona/listar',
+        'salas': '/api/salas/listar',
+        'articulos': '/api/articulo/listar',
+    })
+
+    # 1) Reservas (snapshot compartido con reportes y prediccion), solo la página pedida
+    status, snap, error = lecturas['reservas']
+    if status in (401, 403):
+        flash('Sesión expirada en backend. Vuelve a iniciar sesión.', 'error')
+        return redirect(url_for('logout'))
+    elif not snap and status is not None:
+        flash(f'No se pudieron obtener reservas (HTTP {status})', 'error')
+    elif not snap:
+        flash(f'Error consultando reservas: {error}', 'error')
+    pagina = pagina_reservas(snap or Snapshot([], None), request.args)
+
+    # 2) Datos para selects (si falla, se deja vacío)
+    personas = lecturas['personas'][1]
+    salas = lecturas['salas'][1]
+    articulos = lecturas['articulos'][1]
+
+    return render_template('reservas.html', reservas=pagina['reservas'], pagina=pagina,
+                           personas=personas, salas=salas, articulos=articulos)
+
+
+@app.route('/api/reservas', methods=['GET'])
+@login_required()
+def reservas_pagina():
+    """Página de la tabla de reservas en JSON (mismos parámetros que /reservas)."""
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if snap is None:
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            return jsonify({'error': 'Sesión con backend expirada'}), 401
+        return jsonify({'error': error or f'No se pudieron obtener reservas (HTTP {status})'}), 502
+    return jsonify(pagina_reservas(snap, request.args))
 
 
 @app.route('/reservas/crear', methods=['POST'])
@@ -514,6 +2088,10 @@ def reservas_crear():
     if not payload['fechaHoraInicio'] or not payload['fechaHoraFin']:
         flash('Debe indicar inicio y fin', 'error')
         return redirect(url_for('reservas'))
+    conflictos = conflictos_reserva(payload)
+    if conflictos:
+        flash(mensaje_conflictos(payload, conflictos), 'error')
+        return redirect(url_for('reservas'))
 
     try:
         resp = backend_request('POST', '/api/reservas/crear', json=payload)
@@ -574,6 +2152,10 @@ def reservas_actualizar(reserva_id: int):
     if bool(payload['sala']) == bool(payload['articulo']):
         flash('Debe seleccionar una sala O un artículo (solo uno).', 'error')
         return redirect(url_for('reservas'))
+    conflictos = conflictos_reserva(payload, excluir=reserva_id)
+    if conflictos:
+        flash(mensaje_conflictos(payload, conflictos), 'error')
+        return redirect(url_for('reservas'))
 
     try:
         resp = backend_request('PUT', f'/api/reservas/actualizar/{reserva_id}', json=payload)
@@ -591,6 +2173,55 @@ def reservas_actualizar(reserva_id: int):
     return redirect(url_for('reservas'))
 
 
+# ---------------------------
+#  Disponibilidad de salas
+# ---------------------------
+
+def _lecturas_disponibilidad():
+    """Snapshot de reservas y lista de salas (ambos en cache), en paralelo."""
+    lecturas = backend_fetch_many({
+        'reservas': reservas_snapshot.obtener,
+        'salas': '/api/salas/listar',
+    })
+    return lecturas['reservas'], lecturas['salas']
+
+
+@app.route('/disponibilidad', methods=['GET'])
+@login_required()
+def disponibilidad():
+    """Busca salas libres por horario y capacidad, y el próximo hueco de una sala."""
+    (status, snap, error), (status_salas, salas_data, error_salas) = _lecturas_disponibilidad()
+    if status in (401, 403) or status_salas in (401, 403):
+        flash('Sesión expirada en backend. Vuelve a iniciar sesión.', 'error')
+        return redirect(url_for('logout'))
+    if snap is None:
+        flash(f'No se pudieron obtener reservas: {error or f"HTTP {status}"}', 'error')
+    if status_salas != 200:
+        flash(f'No se pudieron obtener salas: {error_salas or f"HTTP {status_salas}"}', 'error')
+        salas_data = []
+    resultado = buscar_disponibilidad(snap or Snapshot([], None), salas_data, request.args)
+    for mensaje in resultado['errores']:
+        flash(mensaje, 'error')
+    salas = sorted(indice_capacidad_salas(salas_data)['salas'], key=lambda s: str(s['name']))
+    return render_template('disponibilidad.html', resultado=resultado, salas=salas,
+                           limite=DISPONIBILIDAD_MAX, edad=edad_lista('/api/salas/listar'))
+
+
+@app.route('/api/disponibilidad', methods=['GET'])
+@login_required()
+def disponibilidad_api():
+    """Lo mismo que /disponibilidad en JSON (mismos parámetros)."""
+    (status, snap, error), (status_salas, salas_data, error_salas) = _lecturas_disponibilidad()
+    if status in (401, 403) or status_salas in (401, 403):
+        return jsonify({'error': 'Sesión con backend expirada'}), 401
+    if snap is None:
+        return jsonify({'error': error or f'No se pudieron obtener reservas (HTTP {status})'}), 502
+    if status_salas != 200:
+        return jsonify({'error': error_salas or f'No se pudieron obtener salas (HTTP {status_salas})'}), 502
+    resultado = buscar_disponibilidad(snap, salas_data, request.args)
+    return jsonify(resultado), (400 if resultado['errores'] else 200)
+
+
 # ---------------------------
 #  Reportes
 # ---------------------------
@@ -601,86 +2232,86 @@ def reportes():
     """Dashboard de reportes: contadores, calendario y estadísticas.
     Calcula métricas a partir de /api/reservas/listar.
     """
-    reservas = []
-    try:
-        r = backend_request('GET', '/api/reservas/listar')
-        if 200 <= r.status_code < 300:
-            try:
-                reservas = r.json() or []
-            except ValueError:
-                reservas = []
-        elif r.status_code in (401, 403):
-            flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
-            return redirect(url_for('logout'))
-        else:
-            flash(f'No se pudieron obtener reservas (HTTP {r.status_code})', 'error')
-    except Exception as exc:
-        flash(f'Error consultando reservas: {exc}', 'error')
-
-    # Normalización + métricas
-    total = len(reservas)
-    por_persona = {}
-    por_recurso = {}
-    por_fecha = {}
-    eventos = []
-
-    def inc(d, key):
-        if not key:
-            key = 'Desconocido'
-        d[key] = d.get(key, 0) + 1
-
-    for res in reservas:
-        persona = (res.get('persona') or {}).get('nombre') or (res.get('persona') or {}).get('email') or 'N/D'
-        sala = (res.get('sala') or {}).get('nombre')
-        articulo = (res.get('articulo') or {}).get('nombre')
-        inicio = res.get('fechaHoraInicio')
-        fin = res.get('fechaHoraFin')
-
-        inc(por_persona, persona)
-        if sala:
-            recurso_name = "Sala: " + str(sala)
-        elif articulo:
-            recurso_name = "Artículo: " + str(articulo)
-        else:
-            recurso_name = 'Recurso: N/D'
-        inc(por_recurso, recurso_name)
-
-        if inicio:
-            fecha_key = (inicio.split('T')[0] if 'T' in inicio else inicio.split(' ')[0])
-            inc(por_fecha, fecha_key)
-
-        # Evento para calendario
-        eventos.append({
-            'title': f"{persona} - {recurso_name}",
-            'start': inicio,
-            'end': fin
-        })
-
-    # Top N para gráficos
-    def topn(d, n=10):
-        items = sorted(d.items(), key=lambda kv: kv[1], reverse=True)[:n]
-        labels = [k for k, _ in items]
-        values = [v for _, v in items]
-        return labels, values
-
-    personas_labels, personas_vals = topn(por_persona, 10)
-    recurso_labels, recurso_vals = topn(por_recurso, 10)
-    fecha_labels = sorted(por_fecha.keys())
-    fecha_vals = [por_fecha[k] for k in fecha_labels]
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if status in (401, 403):
+        session.pop('backend_session_id', None)
+        flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
+        return redirect(url_for('logout'))
+    elif snap is None and status is not None:
+        flash(f'No se pudieron obtener reservas (HTTP {status})', 'error')
+    elif snap is None:
+        flash(f'Error consultando reservas: {error}', 'error')
+
+    # Métricas (calculadas una vez por versión del snapshot)
+    m = (snap or Snapshot([], None)).derivado('metricas', analitica().metricas_reportes)
 
     # Pasar datos como JSON para Chart.js/FullCalendar
     return render_template(
         'reportes.html',
-        total=total,
-        personas_labels=json.dumps(personas_labels, ensure_ascii=False),
-        personas_vals=json.dumps(personas_vals),
-        recurso_labels=json.dumps(recurso_labels, ensure_ascii=False),
-        recurso_vals=json.dumps(recurso_vals),
-        fecha_labels=json.dumps(fecha_labels),
-        fecha_vals=json.dumps(fecha_vals),
-        eventos=json.dumps(eventos, ensure_ascii=False)
+        total=m['total'],
+        personas_labels=json.dumps(m['personas_labels'], ensure_ascii=False),
+        personas_vals=json.dumps(m['personas_vals']),
+        recurso_labels=json.dumps(m['recurso_labels'], ensure_ascii=False),
+        recurso_vals=json.dumps(m['recurso_vals']),
+        fecha_labels=json.dumps(m['fecha_labels']),
+        fecha_vals=json.dumps(m['fecha_vals']),
+        metricas_etag=etag_metricas(snap) if snap else '',
+        poll_interval=REPORTES_POLL_INTERVAL
     )
 
+
+def etag_metricas(snap: Snapshot) -> str:
+    """Las métricas dependen solo del contenido de las reservas: su versión es el ETag."""
+    return f"metricas-{snap.version}"
+
+
+@app.route('/api/reportes/metricas', methods=['GET'])
+@login_required()
+def reportes_metricas():
+    """Métricas de reportes en JSON; 304 si el snapshot de reservas no cambió (If-None-Match)."""
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if snap is None:
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            return jsonify({'error': 'Sesión con backend expirada'}), 401
+        return jsonify({'error': error or f'No se pudieron obtener reservas (HTTP {status})'}), 502
+
+    etag = etag_metricas(snap)
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = jsonify(snap.derivado('metricas', analitica().metricas_reportes))
+    resp.set_etag(etag)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+
+@app.route('/api/reportes/eventos', methods=['GET'])
+@login_required()
+def reportes_eventos():
+    """Eventos del calendario de reportes para la ventana ?start=&end= que pide FullCalendar."""
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if snap is None:
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            return jsonify({'error': 'Sesión con backend expirada'}), 401
+        return jsonify({'error': error or f'No se pudieron obtener reservas (HTTP {status})'}), 502
+
+    desde = analitica().instante_param(request.args.get('start', ''))
+    hasta = analitica().instante_param(request.args.get('end', ''))
+    # Mismo snapshot y misma ventana -> misma respuesta: al ir y volver de mes
+    # el navegador revalida con If-None-Match y recibe un 304 sin cuerpo
+    etag = f"{snap.version}:{desde}:{hasta}"
+    if etag in request.if_none_match:
+        resp = app.response_class(status=304)
+    else:
+        resp = jsonify(analitica().eventos_rango(snap, desde, hasta))
+    resp.set_etag(etag)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
 # ---------------------------
 #  Personas (listar/crear/actualizar/eliminar)
 # ---------------------------
@@ -690,9 +2321,8 @@ def reportes():
 def personas():
     """Lista personas desde el backend Java."""
     try:
-        resp = backend_request('GET', '/api/persona/listar')
-        if resp.status_code == 200:
-            data = resp.json() or []
+        status, data, error = backend_get('/api/persona/listar')
+        if status == 200:
             personas_list = []
             for p in data:
                 personas_list.append({
@@ -700,12 +2330,14 @@ def personas():
                     'nombre': p.get('nombre') or '',
                     'email': p.get('email') or ''
                 })
-            return render_template('personas.html', personas=personas_list)
-        elif resp.status_code in (401, 403):
+            return render_template('personas.html', personas=personas_list, edad=edad_lista('/api/persona/listar'))
+        elif status in (401, 403):
             flash('Sesi\u00f3n con backend expirada. Vuelve a iniciar sesi\u00f3n.', 'error')
             return redirect(url_for('logout'))
+        elif status is not None:
+            flash(f'No se pudieron obtener personas (HTTP {status})', 'error')
         else:
-            flash(f'No se pudieron obtener personas (HTTP {resp.status_code})', 'error')
+            flash(f'Error consultando personas: {error}', 'error')
     except Exception as exc:
         flash(f'Error consultando personas: {exc}', 'error')
     return render_template('personas.html', personas=[])
@@ -772,33 +2404,19 @@ def personas_delete(id_persona: int):
 def salas():
     """Lista salas desde el backend Java."""
     try:
-        resp = backend_request('GET', '/api/salas/listar')
-        if resp.status_code == 200:
-            data = resp.json() or []
-            salas_list = []
-            for s in data:
-                sid = s.get('idSala') or s.get('id') or s.get('id_sala')
-                nombre = s.get('nombre') or s.get('name') or f"Sala {sid}"
-                capacidad = s.get('Capacidad')
-                if capacidad is None:
-                    capacidad = s.get('capacidad')  # por si viene en minúsculas
-                try:
-                    capacidad = int(capacidad) if capacidad is not None else None
-                except (TypeError, ValueError):
-                    capacidad = None
-
-                salas_list.append({
-                    'id': sid,
-                    'name': nombre,
-                    'capacidad': capacidad
-                })
-            return render_template('salas.html', salas=salas_list, source='backend')
-        elif resp.status_code in (401, 403):
+        status, data, error = backend_get('/api/salas/listar')
+        if status == 200:
+            salas_list = [normalizar_sala(s) for s in data]
+            return render_template('salas.html', salas=salas_list, source='backend',
+                                   edad=edad_lista('/api/salas/listar'))
+        elif status in (401, 403):
             flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
             session.pop('backend_session_id', None)
             return redirect(url_for('logout'))
+        elif status is not None:
+            flash(f'No se pudieron obtener salas (HTTP {status})', 'error')
         else:
-            flash(f'No se pudieron obtener salas (HTTP {resp.status_code})', 'error')
+            flash(f'Error consultando salas: {error}', 'error')
     except Exception as exc:
         flash(f'Error consultando salas: {exc}', 'error')
     # Fallback vacío (como en productos)
@@ -892,97 +2510,675 @@ def salas_delete(id_sala: int):
         flash(f'Error eliminando sala: {exc}', 'error')
     return redirect(url_for('salas'))
 
-@app.route('/prediccion', methods=['GET'])
-@login_required()
-def prediccion():
-    # 1) Histórico desde backend
-    reservas = []
-    try:
-        r = backend_request('GET', '/api/reservas/listar')
-        if 200 <= r.status_code < 300:
+# ---------------------------
+#  Predicción
+# ---------------------------
+
+class ForecastCache:
+    """
+    Predicciones ya calculadas, indexadas por la huella de la serie diaria
+    y los parametros del modelo. LRU en memoria y, si se configura un
+    directorio, persistidas como JSON para sobrevivir reinicios.
+    """
+
+    MODELO = 'arima-5-d-0-v1'
+
+    def __init__(self, maxsize: int, directorio: str = ''):
+        self.maxsize = maxsize
+        self.directorio = directorio
+        self.disco_hits = 0
+        self._mem = TTLCache(float('inf'), maxsize)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    @classmethod
+    def clave(cls, daily, pasos: int) -> str:
+        return analitica().huella_serie(daily.values, f"{cls.MODELO}|{pasos}|{daily.index[0].date()}|")
+
+    def _archivo(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def get(self, clave: str):
+        valor = self._mem.get(clave)
+        if valor is not None or not self.directorio:
+            return valor
+        try:
+            with open(self._archivo(clave), encoding='utf-8') as fh:
+                valor = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        self.disco_hits += 1
+        self._mem.set(clave, valor)
+        return valor
+
+    def set(self, clave: str, valor: dict):
+        self._mem.set(clave, valor)
+        if not self.directorio:
+            return
+        try:
+            tmp = self._archivo(clave) + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                json.dump(valor, fh)
+            os.replace(tmp, self._archivo(clave))
+            self._podar_disco()
+        except OSError as exc:
+            print(f"No se pudo guardar la prediccion en disco: {exc}")
+
+    def _podar_disco(self):
+        archivos = [os.path.join(self.directorio, f) for f in os.listdir(self.directorio) if f.endswith('.json')]
+        if len(archivos) <= self.maxsize:
+            return
+        archivos.sort(key=os.path.getmtime)
+        for f in archivos[:len(archivos) - self.maxsize]:
+            os.remove(f)
+
+    def stats(self) -> dict:
+        datos = self._mem.stats()
+        datos.update(disco=bool(self.directorio), disco_hits=self.disco_hits)
+        return datos
+
+
+prediccion_cache = ForecastCache(PREDICCION_CACHE_MAX, PREDICCION_CACHE_DIR)
+
+
+class ForecastPool:
+    """
+    Pool de procesos acotado para ajustar ARIMA fuera de los hilos de request
+    (el ajuste es CPU y retiene el GIL). Trabajos identicos en curso se
+    comparten, la cola tiene un maximo y al terminar cada trabajo se ejecuta
+    su callback (p.ej. guardar en prediccion_cache), aunque el request que lo
+    pidio ya no espere.
+    """
+
+    def __init__(self, workers: int, cola_max: int):
+        self.workers = workers
+        self.enviados = 0
+        self.completados = 0
+        self.fallidos = 0
+        self.timeouts = 0
+        self.rechazados = 0
+        self._executor = None
+        self._pid = None
+        self._en_curso = {}
+        self._cupos = threading.BoundedSemaphore(cola_max)
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            # spawn: los hijos no heredan hilos ni sockets del worker web
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            self._pid = os.getpid()
+        return self._executor
+
+    def enviar(self, clave: str, fn, *args, al_terminar=None):
+        """
+        Encola fn(*args) y devuelve su Future, o None si la cola esta llena.
+        al_terminar(resultado) se llama cuando el trabajo termina bien.
+        """
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                return futuro
+            if not self._cupos.acquire(blocking=False):
+                self.rechazados += 1
+                return None
             try:
-                reservas = r.json() or []
-            except ValueError:
-                reservas = []
-        elif r.status_code in (401, 403):
-            flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
-            return redirect(url_for('logout'))
-        else:
-            flash(f'No se pudieron obtener reservas (HTTP {r.status_code})', 'error')
+                futuro = self._pool().submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError):
+                # El pool quedo inutilizable (p.ej. un hijo murio): se recrea en el proximo envio
+                self._executor = None
+                self._cupos.release()
+                self.fallidos += 1
+                return None
+            self._en_curso[clave] = futuro
+            self.enviados += 1
+        futuro.add_done_callback(lambda f: self._terminado(clave, f, al_terminar))
+        return futuro
+
+    def _terminado(self, clave: str, futuro, al_terminar):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+        self._cupos.release()
+        if futuro.cancelled():
+            return
+        if futuro.exception() is not None:
+            self.fallidos += 1
+            if isinstance(futuro.exception(), BrokenProcessPool):
+                self._executor = None
+            return
+        self.completados += 1
+        if al_terminar is not None:
+            al_terminar(futuro.result())
+
+    def esperar(self, futuro, timeout: float):
+        """
+        Resultado del trabajo o None si no termino a tiempo. No se cancela:
+        el mismo Future lo esperan todos los que enviaron la misma clave
+        (p.ej. el precalculo) y al terminar igual se ejecuta su callback.
+        """
+        try:
+            return futuro.result(timeout=timeout)
+        except FutureTimeout:
+            self.timeouts += 1
+        except Exception as exc:
+            print(f"Error calculando prediccion: {exc}")
+        return None
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'en_curso': len(self._en_curso),
+            'enviados': self.enviados,
+            'completados': self.completados,
+            'fallidos': self.fallidos,
+            'timeouts': self.timeouts,
+            'rechazados': self.rechazados,
+        }
+
+
+forecast_pool = ForecastPool(PREDICCION_WORKERS, PREDICCION_COLA_MAX)
+
+
+estados_prediccion = TTLCache(float('inf'), PREDICCION_ESTADOS_MAX)
+prediccion_contadores = {'ajustes': 0, 'incrementales': 0}
+
+
+def _huella_serie(valores) -> str:
+    return analitica().huella_serie(valores)
+
+
+def guardar_estado(serie: str, daily, estado: dict, ajustado_en: float = None):
+    """Recuerda los parametros ajustados de la serie para extenderla mas adelante."""
+    if estado is None:
+        return
+    estados_prediccion.set(serie, {
+        'inicio': daily.index[0],
+        'n': len(daily),
+        'huella': _huella_serie(daily.values),
+        'estado': estado,
+        'ajustado_en': time.monotonic() if ajustado_en is None else ajustado_en,
+    })
+
+
+def estado_extensible(serie: str, daily):
+    """
+    Estado previo de la serie si sirve para una actualizacion incremental:
+    mismo inicio, solo dias nuevos al final (el historico no cambio) y
+    ajuste completo dentro del intervalo de reajuste.
+    """
+    previo = estados_prediccion.get(serie)
+    if previo is None:
+        return None
+    if time.monotonic() - previo['ajustado_en'] > PREDICCION_REFIT_INTERVAL:
+        return None
+    if daily.index[0] != previo['inicio'] or len(daily) < previo['n']:
+        return None
+    if _huella_serie(daily.values[:previo['n']]) != previo['huella']:
+        return None
+    return previo
+
+
+def prediccion_conocida(daily, pasos: int, serie: str):
+    """
+    Prediccion sin ajuste completo: desde la cache o extendiendo el ultimo
+    ajuste de la serie con los dias nuevos. None si hace falta ajustar.
+    """
+    clave = ForecastCache.clave(daily, pasos)
+    resultado = prediccion_cache.get(clave)
+    if resultado is not None:
+        return resultado
+
+    previo = estado_extensible(serie, daily)
+    if previo is None:
+        return None
+    try:
+        resultado = analitica().extender_prediccion(daily, pasos, previo['estado'])
     except Exception as exc:
-        flash(f'Error consultando reservas: {exc}', 'error')
+        print(f"No se pudo extender la prediccion de {serie}: {exc}")
+        return None
+    prediccion_contadores['incrementales'] += 1
+    prediccion_cache.set(clave, resultado)
+    guardar_estado(serie, daily, previo['estado'], previo['ajustado_en'])
+    return resultado
 
-    # 2) Serie diaria (conteo por fecha)
-    def parse_dt(dt_str: str):
-        if not dt_str:
+
+def registrar_ajuste(serie: str, daily, pasos: int, ajuste: tuple):
+    salida, estado = ajuste
+    prediccion_contadores['ajustes'] += 1
+    prediccion_cache.set(ForecastCache.clave(daily, pasos), salida)
+    guardar_estado(serie, daily, estado)
+
+
+def _registrar_lote(series: dict, pasos: int, ajustes: dict):
+    for serie, ajuste in ajustes.items():
+        registrar_ajuste(serie, series[serie], pasos, ajuste)
+
+
+@medido('forecast', 'serie')
+def obtener_prediccion(daily, pasos: int, serie: str = 'total', deadline: float = None) -> dict:
+    """
+    Prediccion de la serie: desde la cache, extendiendo el ultimo ajuste con
+    los dias nuevos, o con un ajuste completo en el pool de procesos.
+    Si el ajuste no termina antes del deadline se devuelve solo el historico.
+    """
+    resultado = prediccion_conocida(daily, pasos, serie)
+    if resultado is not None:
+        return resultado
+
+    if forecast_pool.workers <= 0:
+        ajuste = analitica().ajustar_prediccion(daily, pasos)
+        registrar_ajuste(serie, daily, pasos, ajuste)
+        return ajuste[0]
+
+    ajuste = None
+    futuro = forecast_pool.enviar(ForecastCache.clave(daily, pasos), analitica().ajustar_prediccion, daily, pasos,
+                                  al_terminar=partial(registrar_ajuste, serie, daily, pasos))
+    if futuro is not None:
+        ajuste = forecast_pool.esperar(futuro, PREDICCION_DEADLINE if deadline is None else deadline)
+    return ajuste[0] if ajuste else analitica().historico(daily)
+
+
+@medido('forecast', 'lote')
+def predicciones_lote(series: dict, pasos: int, deadline: float = None):
+    """
+    Predice varias series ({serie: daily}). Las que no salen de la cache ni
+    de una extension incremental se reparten en un trabajo por worker del
+    pool y se ajustan en paralelo. Devuelve (predicciones, pendientes): las
+    pendientes no terminaron antes del deadline y van solo con el historico.
+    """
+    resultados = {}
+    faltantes = {}
+    for serie, daily in series.items():
+        resultado = prediccion_conocida(daily, pasos, serie)
+        if resultado is not None:
+            resultados[serie] = resultado
+        else:
+            faltantes[serie] = daily
+
+    if faltantes and forecast_pool.workers <= 0:
+        ajustes = analitica().ajustar_lote(faltantes, pasos)
+        _registrar_lote(faltantes, pasos, ajustes)
+        resultados.update({serie: ajuste[0] for serie, ajuste in ajustes.items()})
+    elif faltantes:
+        nombres = sorted(faltantes)
+        futuros = []
+        for i in range(forecast_pool.workers):
+            parte = {serie: faltantes[serie] for serie in nombres[i::forecast_pool.workers]}
+            if not parte:
+                continue
+            huella = hashlib.sha1('|'.join(ForecastCache.clave(d, pasos) for d in parte.values()).encode())
+            futuros.append(forecast_pool.enviar(f"lote:{huella.hexdigest()}", analitica().ajustar_lote, parte, pasos,
+                                                al_terminar=partial(_registrar_lote, parte, pasos)))
+        limite = time.monotonic() + (PREDICCION_DEADLINE if deadline is None else deadline)
+        for futuro in futuros:
+            if futuro is None:
+                continue
+            ajustes = forecast_pool.esperar(futuro, max(limite - time.monotonic(), 0))
+            if ajustes:
+                resultados.update({serie: ajuste[0] for serie, ajuste in ajustes.items()})
+
+    pendientes = [serie for serie in series if serie not in resultados]
+    for serie in pendientes:
+        resultados[serie] = analitica().historico(series[serie])
+    return resultados, pendientes
+
+
+def lote_recursos(snap: Snapshot, elegido: str = None, deadline: float = None) -> dict:
+    """Predicción por sala y por artículo (todas, o solo `elegido`) con el tiempo del lote."""
+    inicio = time.perf_counter()
+    pivot = snap.derivado('series_recursos', analitica().series_por_recurso)
+    nombres = snap.derivado('nombres_recursos', analitica().nombres_recursos)
+    columnas = [elegido] if elegido in pivot.columns else list(pivot.columns)
+
+    series = {}
+    for recurso in columnas:
+        s = pivot[recurso]
+        # Cada recurso arranca en su primera reserva
+        series[recurso] = s.loc[s.ne(0).idxmax():]
+    predicciones, pendientes = predicciones_lote(series, PREDICCION_PASOS, deadline)
+
+    return {
+        'pasos': PREDICCION_PASOS,
+        'duracion_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        'recursos': sorted(({'id': r, 'nombre': nombres.get(r, r), 'reservas': int(pivot[r].sum())}
+                            for r in pivot.columns), key=lambda r: r['nombre']),
+        'predicciones': predicciones,
+        'pendientes': pendientes,
+    }
+
+
+class PrecalculoPredicciones:
+    """
+    Hilo que cada cierto intervalo descarga las reservas y recalcula las
+    predicciones (total y por recurso). El resultado se publica con una sola
+    asignacion, asi las vistas nunca leen un calculo a medias.
+    Se autentica solo con las credenciales de servicio (BACKEND_SERVICE_USER),
+    nunca con la sesion de un usuario.
+    """
+
+    def __init__(self, intervalo: float, deadline: float):
+        self.intervalo = intervalo
+        self.deadline = deadline
+        self.publicado = None
+        self.ejecuciones = 0
+        self.ultimo_error = None
+        self._sesion = None
+        self._hilo = None
+        self._despertar = threading.Event()
+
+    def _cookies(self):
+        if not BACKEND_SERVICE_USER:
             return None
-        for fmt in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        if not self._sesion:
+            self._sesion, _ = authenticate_backend(BACKEND_SERVICE_USER, BACKEND_SERVICE_PASSWORD)
+        return {'JSESSIONID': self._sesion} if self._sesion else None
+
+    def ejecutar(self) -> bool:
+        cookies = self._cookies()
+        if cookies is None:
+            self.ultimo_error = 'Sin sesión de servicio con el backend (BACKEND_SERVICE_USER)'
+            return False
+
+        inicio = time.perf_counter()
+        status, snap, error = reservas_snapshot.obtener(cookies)
+        if snap is None:
+            if status in (401, 403):
+                self._sesion = None
+            self.ultimo_error = error or f'No se pudieron obtener reservas (HTTP {status})'
+            return False
+
+        daily = analitica().serie_diaria(snap.inicios)
+        total = obtener_prediccion(daily, PREDICCION_PASOS, deadline=self.deadline) if daily is not None else None
+        recursos = lote_recursos(snap, deadline=self.deadline)
+        self.publicado = {
+            'version': snap.version,
+            'total': total,
+            'recursos': recursos,
+            'generado': datetime.now(),
+            'generado_en': time.monotonic(),
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        }
+        self.ejecuciones += 1
+        self.ultimo_error = None
+        return True
+
+    def bucle(self):
+        while True:
             try:
-                return datetime.strptime(dt_str, fmt)
-            except ValueError:
-                continue
-        return None
+                self.ejecutar()
+            except Exception as exc:
+                self.ultimo_error = str(exc)
+                print(f"Error en el precalculo de predicciones: {exc}")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def iniciar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self.bucle, name='precalculo-predicciones', daemon=True)
+            self._hilo.start()
+
+    def despertar(self):
+        """Adelanta la proxima ejecucion (p.ej. cuando cambian las reservas)."""
+        self._despertar.set()
+
+    def frescura(self):
+        publicado = self.publicado
+        if publicado is None:
+            return None
+        return {
+            'generado': publicado['generado'].strftime('%Y-%m-%d %H:%M:%S'),
+            'edad': int(time.monotonic() - publicado['generado_en']),
+            'duracion_ms': publicado['duracion_ms'],
+        }
+
+    def stats(self) -> dict:
+        return {
+            'activo': self._hilo is not None and self._hilo.is_alive(),
+            'intervalo': self.intervalo,
+            'ejecuciones': self.ejecuciones,
+            'ultimo_error': self.ultimo_error,
+            'publicado': self.frescura(),
+        }
+
+
+precalculo = PrecalculoPredicciones(PREDICCION_PRECALCULO_INTERVALO, PREDICCION_PRECALCULO_DEADLINE)
+
 
-    fechas = []
-    for res in reservas:
-        d = parse_dt(res.get('fechaHoraInicio'))
-        if d:
-            fechas.append(d.date())
+_precalculo_pid = {'pid': None}
 
-    if not fechas:
+
+def iniciar_precalculo():
+    """
+    Arranca el precalculo en segundo plano, una vez por proceso y solo si
+    hay credenciales de servicio. Se llama en el primer request de cada
+    worker (o desde post_worker_init de gunicorn), no al importar: asi un
+    script que importa app o el master de gunicorn --preload no lanzan hilos.
+    """
+    pid = os.getpid()
+    if _precalculo_pid['pid'] == pid:
+        return
+    _precalculo_pid['pid'] = pid
+    if PREDICCION_PRECALCULO_INTERVALO > 0 and BACKEND_SERVICE_USER and multiprocessing.parent_process() is None:
+        precalculo.iniciar()
+
+
+@app.before_request
+def arrancar_precalculo():
+    iniciar_precalculo()
+
+
+@app.route('/prediccion', methods=['GET'])
+@login_required()
+def prediccion():
+    # Si el precalculo ya publicó un resultado se usa directamente, pero se
+    # calculó con la sesión de servicio: antes se verifica la del usuario
+    publicado = precalculo.publicado
+    if publicado is not None:
+        status, _ = autorizar_cache(backend_cookies())
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
+            return redirect(url_for('logout'))
+        resultado = publicado['total'] or dict.fromkeys(PREDICCION_CLAVES, [])
+        return render_template('prediccion.html',
+                               hist_labels=json.dumps(resultado['hist_labels']),
+                               hist_vals=json.dumps(resultado['hist_vals']),
+                               fc_labels=json.dumps(resultado['fc_labels']),
+                               fc_vals=json.dumps(resultado['fc_vals']),
+                               ci_lower=json.dumps(resultado['ci_lower']),
+                               ci_upper=json.dumps(resultado['ci_upper']),
+                               n=len(resultado['fc_labels']),
+                               frescura=precalculo.frescura())
+
+    # 1) Histórico desde backend
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if snap is None and status in (401, 403):
+        session.pop('backend_session_id', None)
+        flash('Sesión con backend expirada. Inicia sesión de nuevo.', 'error')
+        return redirect(url_for('logout'))
+    elif snap is None and status is not None:
+        flash(f'No se pudieron obtener reservas (HTTP {status})', 'error')
+    elif snap is None:
+        flash(f'Error consultando reservas: {error}', 'error')
+
+    # Sin resultado publicado: si el precalculo esta activo, que corra ya
+    precalculo.despertar()
+
+    # 2) Serie diaria (conteo por fecha)
+    daily = analitica().serie_diaria(snap.inicios) if snap is not None else None
+    if daily is None:
         return render_template('prediccion.html',
                                hist_labels="[]", hist_vals="[]",
                                fc_labels="[]", fc_vals="[]",
-                               ci_lower="[]", ci_upper="[]")
-
-    s = pd.Series(1, index=pd.to_datetime(fechas))
-    s = s.groupby(s.index.date).sum()
-    s.index = pd.to_datetime(s.index)
-    s = s.sort_index()
-    full_idx = pd.date_range(start=s.index.min(), end=s.index.max(), freq='D')
-    daily = s.reindex(full_idx, fill_value=0).astype(float)
-
-    # 3) ADF para d
-    try:
-        d_param = 1 if adfuller(daily.dropna())[1] > 0.05 else 0
-    except Exception:
-        d_param = 0
-
-    # 4) ARIMA + forecast
-    pasos_prediccion = 14  # 14 días (cambialo si querés)
-    try:
-        model = ARIMA(daily.asfreq('D'), order=(5, d_param, 0))
-        result = model.fit()
-        fc = result.get_forecast(steps=pasos_prediccion)
-        fc_mean = fc.predicted_mean.clip(lower=0)
-        conf = fc.conf_int()
-        conf.iloc[:, 0] = conf.iloc[:, 0].clip(lower=0)
-        conf.iloc[:, 1] = conf.iloc[:, 1].clip(lower=0)
-
-        future_index = pd.date_range(start=daily.index[-1] + pd.Timedelta(days=1),
-                                     periods=pasos_prediccion, freq='D')
-        fc_mean.index = future_index
-        conf.index = future_index
-
-        hist_labels = [d.strftime("%Y-%m-%d") for d in daily.index]
-        hist_vals   = [float(v) for v in daily.values]
-        fc_labels   = [d.strftime("%Y-%m-%d") for d in future_index]
-        fc_vals     = [round(float(v), 2) for v in fc_mean.values]
-        ci_lower    = [round(float(v), 2) for v in conf.iloc[:, 0].values]
-        ci_upper    = [round(float(v), 2) for v in conf.iloc[:, 1].values]
-    except Exception:
-        # Si falla ARIMA, solo mostramos histórico
-        hist_labels = [d.strftime("%Y-%m-%d") for d in daily.index]
-        hist_vals   = [float(v) for v in daily.values]
-        fc_labels = fc_vals = ci_lower = ci_upper = []
+                               ci_lower="[]", ci_upper="[]", n=0)
+
+    # 3) ADF + ARIMA en el pool de procesos (reutiliza el resultado si la serie no cambió)
+    resultado = obtener_prediccion(daily, PREDICCION_PASOS)
 
     return render_template('prediccion.html',
-                           hist_labels=json.dumps(hist_labels),
-                           hist_vals=json.dumps(hist_vals),
-                           fc_labels=json.dumps(fc_labels),
-                           fc_vals=json.dumps(fc_vals),
-                           ci_lower=json.dumps(ci_lower),
-                           ci_upper=json.dumps(ci_upper))
+                           hist_labels=json.dumps(resultado['hist_labels']),
+                           hist_vals=json.dumps(resultado['hist_vals']),
+                           fc_labels=json.dumps(resultado['fc_labels']),
+                           fc_vals=json.dumps(resultado['fc_vals']),
+                           ci_lower=json.dumps(resultado['ci_lower']),
+                           ci_upper=json.dumps(resultado['ci_upper']),
+                           n=len(resultado['fc_labels']))
+
+@app.route('/api/prediccion/recursos', methods=['GET'])
+@login_required()
+def prediccion_recursos():
+    """
+    Predicción por sala y por artículo (JSON). Con ?recurso=<id> devuelve
+    solo ese recurso; sin parámetro, el lote completo.
+    """
+    elegido = request.args.get('recurso')
+    publicado = precalculo.publicado
+    if publicado is not None and not elegido:
+        status, _ = autorizar_cache(backend_cookies())
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            return jsonify({'error': 'Sesión con backend expirada'}), 401
+        return jsonify(dict(publicado['recursos'], frescura=precalculo.frescura()))
+
+    status, snap, error = reservas_snapshot.obtener(backend_cookies())
+    if snap is None:
+        if status in (401, 403):
+            session.pop('backend_session_id', None)
+            return jsonify({'error': 'Sesión con backend expirada'}), 401
+        return jsonify({'error': error or f'No se pudieron obtener reservas (HTTP {status})'}), 502
+    return jsonify(lote_recursos(snap, elegido))
+
+# ---------------------------
+#  Diagnostico del cliente backend
+# ---------------------------
+
+@app.route('/api/admin/backend/stats')
+@login_required(admin_only=True)
+def backend_stats():
+    """Estadisticas del pool de conexiones hacia el backend (por worker)."""
+    return jsonify({
+        'pool': backend_pool_stats(),
+        'coalescing': coalescer.stats(),
+        'circuit_breaker': circuit_breaker.stats(),
+        'listas_cache': dict(listas_cache.stats(),
+                             ttl_blando=LISTAS_CACHE_TTL,
+                             servidas_viejas=listas_revalidacion['servidas_viejas'],
+                             revalidaciones=listas_revalidacion['revalidaciones']),
+        'sesiones_validas': sesiones_validas.stats(),
+        'roles_index': roles_index.stats(),
+        'reservas_snapshot': reservas_snapshot.stats(),
+        'prediccion_cache': prediccion_cache.stats(),
+        'prediccion_pool': forecast_pool.stats(),
+        'prediccion_incremental': dict(prediccion_contadores, series=estados_prediccion.stats()['entradas']),
+        'prediccion_precalculo': precalculo.stats(),
+        'arranque': estado_arranque(),
+        'perfilador': perfilador.stats(),
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Histogramas del worker en formato de texto de Prometheus (sin sesion, opcionalmente con token)."""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return 'No autorizado\n', 401, {'Content-Type': 'text/plain; charset=utf-8'}
+    return exponer_metricas(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+# ---------------------------
+#  Perfiles (admin)
+# ---------------------------
+
+def rutas_perfilables() -> list:
+    return sorted({r.rule for r in app.url_map.iter_rules()
+                   if 'GET' in r.methods and not r.rule.startswith(('/static', '/admin/perfiles'))})
+
+
+@app.route('/admin/perfiles')
+@app.route('/admin/perfiles/<perfil_id>')
+@login_required(admin_only=True)
+def perfiles(perfil_id=None):
+    """Plan del perfilador, perfiles guardados y el detalle de uno (top de funciones y pilas)."""
+    perfil = None
+    pilas = []
+    if perfil_id:
+        perfil = perfilador.obtener(perfil_id)
+        if perfil is None:
+            flash('El perfil no existe (pudo haberse borrado por el tope de espacio)', 'error')
+            return redirect(url_for('perfiles'))
+        pilas = perfilador.pilas(perfil_id)
+    return render_template('perfiles.html', estado=perfilador.stats(), perfiles=perfilador.listar(),
+                           rutas=rutas_perfilables(), modos=Perfilador.MODOS, perfil=perfil, pilas=pilas,
+                           tiene_prof=bool(perfil_id and perfilador.archivo(perfil_id, 'prof')))
+
+
+@app.route('/admin/perfiles/armar', methods=['POST'])
+@login_required(admin_only=True)
+def perfiles_armar():
+    ruta = request.form.get('ruta') or None
+    modo = request.form.get('modo', 'muestreo')
+    try:
+        cada = int(request.form.get('cada') or 1)
+        cantidad = int(request.form.get('cantidad') or 1)
+    except ValueError:
+        flash('"Uno de cada" y "cantidad" deben ser números enteros', 'error')
+        return redirect(url_for('perfiles'))
+    if ruta is not None and ruta not in rutas_perfilables():
+        flash(f'Ruta desconocida: {ruta}', 'error')
+        return redirect(url_for('perfiles'))
+    perfilador.armar(ruta, modo, cada, cantidad)
+    flash(f"Perfilador armado: {cantidad} request(s) de {ruta or 'cualquier ruta'}, uno de cada {max(cada, 1)}", 'success')
+    return redirect(url_for('perfiles'))
+
+
+@app.route('/admin/perfiles/desarmar', methods=['POST'])
+@login_required(admin_only=True)
+def perfiles_desarmar():
+    perfilador.desarmar()
+    flash('Perfilador desarmado', 'success')
+    return redirect(url_for('perfiles'))
+
+
+@app.route('/admin/perfiles/<perfil_id>/colapsado')
+@login_required(admin_only=True)
+def perfil_colapsado(perfil_id):
+    """Pilas colapsadas ("a;b;c N"), para flamegraph.pl o speedscope."""
+    ruta = perfilador.archivo(perfil_id, 'txt')
+    if ruta is None:
+        return 'Perfil no encontrado\n', 404
+    try:
+        return send_file(ruta, mimetype='text/plain', download_name=f'{perfil_id}.txt')
+    except OSError:
+        # Se borró entre la verificación y el envío (poda de otro worker)
+        return 'Perfil no encontrado\n', 404
+
+
+@app.route('/admin/perfiles/<perfil_id>/prof')
+@login_required(admin_only=True)
+def perfil_prof(perfil_id):
+    """Estadisticas de cProfile (pstats/snakeviz)."""
+    ruta = perfilador.archivo(perfil_id, 'prof')
+    if ruta is None:
+        return 'Perfil no encontrado\n', 404
+    try:
+        return send_file(ruta, mimetype='application/octet-stream', as_attachment=True,
+                         download_name=f'{perfil_id}.prof')
+    except OSError:
+        return 'Perfil no encontrado\n', 404
+
+arranque['import_ms'] = round((time.perf_counter() - _inicio_import) * 1000, 1)
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    if '--arranque' in sys.argv:
+        # Costo de arranque por worker, con la analitica diferida y precargada
+        print(json.dumps(reporte_arranque(), indent=2))
+    elif '--precalcular' in sys.argv:
+        # Worker acompañante: solo precalcula (comparte resultados via PREDICCION_CACHE_DIR)
+        if not BACKEND_SERVICE_USER:
+            sys.exit('El precalculo necesita BACKEND_SERVICE_USER y BACKEND_SERVICE_PASSWORD')
+        precargar_analitica()
+        precalculo.bucle()
+    else:
+        app.run(debug=True)
+elif ANALYTICS_PRELOAD:
+    precargar_analitica()
@@ -0,0 +1,255 @@
+"""
+Benchmark de rutas de app.py contra el backend simulado (bench/stub_backend.py).
+
+Para cada tamaño de datos levanta el backend simulado en un proceso aparte y,
+en un proceso nuevo por modo, recorre las rutas con el test client de Flask
+(testclient) y con un servidor WSGI real (wsgi). Registra percentiles de
+latencia, throughput y pico de RSS del proceso de la app en un JSON
+comparable entre corridas. El pico de RSS es acumulado: las rutas de un modo
+comparten proceso, asi que cada fila informa el maximo alcanzado hasta esa
+ruta inclusive, no el consumo de la ruta aislada.
+
+    python bench/run.py --tamanos 100,10000,100000 --salida bench/baseline.json
+    python bench/run.py --tamanos 100,10000 --comparar bench/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTAS = ('/login', '/reservas', '/reportes', '/prediccion', '/users')
+LOGIN = {'email': 'admin@bench.local', 'password': 'bench'}
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil p (0-100) con interpolacion lineal sobre valores ordenados."""
+    if not valores:
+        return None
+    k = (len(valores) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(valores) - 1)
+    return valores[i] + (valores[j] - valores[i]) * (k - i)
+
+
+def rss_pico_acumulado_mb() -> float:
+    """Pico de RSS del proceso desde que arranco (ru_maxrss nunca baja)."""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB, macOS bytes
+    return round(pico / (2 ** 20 if sys.platform == 'darwin' else 1024), 1)
+
+
+# ---------------------------
+#  Proceso de medicion (uno por tamaño y modo)
+# ---------------------------
+
+class ClienteTest:
+    def __init__(self, app):
+        self._c = app.test_client()
+
+    def post(self, ruta, data):
+        return self._c.post(ruta, data=data).status_code
+
+    def get(self, ruta):
+        return self._c.get(ruta).status_code
+
+
+class ClienteHTTP:
+    def __init__(self, base):
+        import requests
+        self._base = base
+        self._s = requests.Session()
+
+    def post(self, ruta, data):
+        return self._s.post(self._base + ruta, data=data, allow_redirects=False).status_code
+
+    def get(self, ruta):
+        return self._s.get(self._base + ruta, allow_redirects=False).status_code
+
+
+def peticion(cliente, ruta: str) -> bool:
+    """Una peticion a la ruta; True si respondio como se espera."""
+    if ruta == '/login':
+        # Login correcto redirige al dashboard
+        return cliente.post('/login', LOGIN) == 302
+    return cliente.get(ruta) == 200
+
+
+def medir(modo: str, rutas: list, requests_por_ruta: int, concurrencia: int) -> list:
+    sys.path.insert(0, RAIZ)
+    import app as modulo
+    modulo.app.config['WTF_CSRF_ENABLED'] = False
+
+    if modo == 'wsgi':
+        from werkzeug.serving import make_server
+        servidor = make_server('127.0.0.1', 0, modulo.app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{servidor.server_port}"
+
+        def nuevo_cliente():
+            return ClienteHTTP(base)
+    else:
+        def nuevo_cliente():
+            return ClienteTest(modulo.app)
+
+    resultados = []
+    for ruta in rutas:
+        # /login se mide con un cliente nuevo por peticion; el resto con sesion iniciada
+        clientes = [nuevo_cliente() for _ in range(concurrencia)]
+        if ruta != '/login':
+            for cliente in clientes:
+                cliente.post('/login', LOGIN)
+
+        def cliente_para(k):
+            return nuevo_cliente() if ruta == '/login' else clientes[k]
+
+        # Primera peticion aparte (caches frias)
+        inicio = time.perf_counter()
+        primera_ok = peticion(cliente_para(0), ruta)
+        primera_ms = (time.perf_counter() - inicio) * 1000
+
+        latencias = []
+        errores = [0 if primera_ok else 1]
+        lock = threading.Lock()
+        cuota = max(requests_por_ruta // concurrencia, 1)
+
+        def trabajar(k):
+            propias, fallidas = [], 0
+            for _ in range(cuota):
+                cliente = cliente_para(k)
+                t = time.perf_counter()
+                if not peticion(cliente, ruta):
+                    fallidas += 1
+                propias.append((time.perf_counter() - t) * 1000)
+            with lock:
+                latencias.extend(propias)
+                errores[0] += fallidas
+
+        hilos = [threading.Thread(target=trabajar, args=(k,)) for k in range(concurrencia)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        latencias.sort()
+        resultados.append({
+            'ruta': ruta,
+            'modo': modo,
+            'n': len(latencias),
+            'errores': errores[0],
+            'primera_ms': round(primera_ms, 2),
+            'p50_ms': round(percentil(latencias, 50), 2),
+            'p90_ms': round(percentil(latencias, 90), 2),
+            'p99_ms': round(percentil(latencias, 99), 2),
+            'max_ms': round(latencias[-1], 2),
+            'rps': round(len(latencias) / duracion, 1) if duracion else None,
+            'rss_pico_acumulado_mb': rss_pico_acumulado_mb(),
+        })
+    return resultados
+
+
+# ---------------------------
+#  Orquestacion
+# ---------------------------
+
+def levantar_backend(tamano: int, latencia: float, jitter: float):
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, 'bench', 'stub_backend.py'), '--reservas', str(tamano),
+         '--latencia', str(latencia), '--jitter', str(jitter), '--puerto', '0'],
+        stdout=subprocess.PIPE, text=True)
+    linea = proceso.stdout.readline()
+    if 'http://' not in linea:
+        proceso.kill()
+        raise RuntimeError(f"No arranco el backend simulado: {linea!r}")
+    return proceso, linea.split()[3]
+
+
+def correr(args) -> dict:
+    resultados = []
+    for tamano in args.tamanos:
+        backend, url = levantar_backend(tamano, args.latencia, args.jitter)
+        try:
+            for modo in args.modos:
+                entorno = dict(os.environ, BACKEND_BASE=url, PREDICCION_PRECALCULO_INTERVALO='0')
+                salida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--medir', modo,
+                     '--rutas', ','.join(args.rutas), '--requests', str(args.requests),
+                     '--concurrencia', str(args.concurrencia)],
+                    cwd=RAIZ, env=entorno, capture_output=True, text=True)
+                if salida.returncode != 0:
+                    print(salida.stderr, file=sys.stderr)
+                    raise RuntimeError(f"Fallo la medicion ({tamano} reservas, {modo})")
+                for fila in json.loads(salida.stdout.strip().splitlines()[-1]):
+                    fila['tamano'] = tamano
+                    resultados.append(fila)
+                    print(f"{tamano:>8} {modo:<10} {fila['ruta']:<12} p50 {fila['p50_ms']:>9.2f} ms  "
+                          f"p90 {fila['p90_ms']:>9.2f} ms  {fila['rps']:>8} rps  "
+                          f"rss pico acum. {fila['rss_pico_acumulado_mb']:>7} MB  errores {fila['errores']}", flush=True)
+        finally:
+            backend.kill()
+            backend.wait()
+    return {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'latencia_backend': args.latencia,
+            'jitter_backend': args.jitter,
+            'requests': args.requests,
+            'concurrencia': args.concurrencia,
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar(actual: dict, base: dict):
+    previos = {(r['tamano'], r['modo'], r['ruta']): r for r in base.get('resultados', [])}
+    print(f"\n{'tamano':>8} {'modo':<10} {'ruta':<12} {'p50 base':>10} {'p50':>10} {'Δ%':>7} {'rps base':>9} {'rps':>9}")
+    for r in actual['resultados']:
+        b = previos.get((r['tamano'], r['modo'], r['ruta']))
+        if b is None:
+            continue
+        delta = (r['p50_ms'] - b['p50_ms']) / b['p50_ms'] * 100 if b['p50_ms'] else 0.0
+        print(f"{r['tamano']:>8} {r['modo']:<10} {r['ruta']:<12} {b['p50_ms']:>10.2f} {r['p50_ms']:>10.2f} "
+              f"{delta:>+7.1f} {b['rps']:>9} {r['rps']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de rutas contra el backend simulado')
+    parser.add_argument('--tamanos', default='100,10000,100000',
+                        type=lambda v: [int(x) for x in v.split(',')], help='reservas por corrida (hasta 1000000)')
+    parser.add_argument('--modos', default='testclient,wsgi', type=lambda v: v.split(','))
+    parser.add_argument('--rutas', default=','.join(RUTAS), type=lambda v: v.split(','))
+    parser.add_argument('--requests', type=int, default=40, help='peticiones por ruta')
+    parser.add_argument('--concurrencia', type=int, default=4)
+    parser.add_argument('--latencia', type=float, default=0.005, help='latencia del backend simulado (s)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--salida', default=os.path.join(RAIZ, 'bench', 'baseline.json'))
+    parser.add_argument('--comparar', default=None, help='JSON de una corrida anterior')
+    parser.add_argument('--medir', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.rutas, args.requests, args.concurrencia)))
+        return
+
+    actual = correr(args)
+    with open(args.salida, 'w', encoding='utf-8') as fh:
+        json.dump(actual, fh, indent=2)
+    print(f"\nResultados en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as fh:
+            comparar(actual, json.load(fh))
+
+
+if __name__ == '__main__':
+    main()
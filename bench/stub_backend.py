@@ -0,0 +1,229 @@
+"""
+Backend Java simulado para los benchmarks: /auth/login, /auth/logout y
+/api/<recurso>/listar, add/crear, actualizar/update y borrar/eliminar con
+datos sinteticos en memoria (de 100 a 1M de reservas) y latencia configurable.
+
+    python bench/stub_backend.py --reservas 100000 --latencia 0.02 --puerto 8080
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Recurso del path (/api/<recurso>/...) -> campo id
+IDS = {
+    'persona': 'idPersona',
+    'salas': 'idSala',
+    'articulo': 'idArticulo',
+    'usuario': 'idUsuario',
+    'reservas': 'id',
+}
+# Accion del path (/api/<recurso>/<accion>) -> (operacion, metodo esperado)
+ACCIONES = {
+    'add': ('crear', 'POST'),
+    'crear': ('crear', 'POST'),
+    'actualizar': ('actualizar', 'PUT'),
+    'update': ('actualizar', 'PUT'),
+    'borrar': ('borrar', 'DELETE'),
+    'eliminar': ('borrar', 'DELETE'),
+}
+USUARIO_BENCH = 'admin@bench.local'
+FORMATOS = ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S")
+
+
+def generar(reservas: int, personas: int = None, salas: int = None, articulos: int = None,
+            usuarios: int = 20, dias: int = 365, semilla: int = 1) -> dict:
+    """
+    Datos sinteticos con la forma de las respuestas del backend. Por defecto
+    personas y salas crecen con la cantidad de reservas. Incluye algunas
+    fechas en otros formatos y sin inicio, como los datos reales.
+    """
+    rnd = random.Random(semilla)
+    personas = personas or max(10, min(reservas // 20, 50000))
+    salas = salas or max(5, min(reservas // 500, 2000))
+    articulos = articulos or max(5, min(reservas // 1000, 1000))
+
+    lista_personas = [{'idPersona': i, 'nombre': f'Persona {i}', 'email': f'persona{i}@bench.local'}
+                      for i in range(1, personas + 1)]
+    lista_salas = [{'idSala': i, 'nombre': f'Sala {i}', 'capacidad': rnd.randint(2, 60)}
+                   for i in range(1, salas + 1)]
+    lista_articulos = [{'idArticulo': i, 'nombre': f'Articulo {i}', 'disponible': bool(i % 3)}
+                       for i in range(1, articulos + 1)]
+    lista_usuarios = [{'idUsuario': 1, 'nombre': 'Admin bench', 'username': USUARIO_BENCH,
+                       'roles': [{'nombre': 'ROLE_ADMIN'}]}]
+    lista_usuarios += [{'idUsuario': i, 'nombre': f'Usuario {i}', 'username': f'usuario{i}@bench.local',
+                        'roles': [{'nombre': 'ROLE_USER'}]} for i in range(2, usuarios + 1)]
+
+    base = datetime(2024, 1, 1, 8)
+    lista_reservas = []
+    for i in range(1, reservas + 1):
+        inicio = base + timedelta(days=rnd.randrange(dias), hours=rnd.randrange(12), minutes=rnd.choice((0, 30)))
+        fin = inicio + timedelta(minutes=rnd.choice((30, 60, 90, 120, 180)))
+        fmt = FORMATOS[0] if i % 50 else rnd.choice(FORMATOS)
+        res = {
+            'id': i,
+            'persona': lista_personas[rnd.randrange(personas)],
+            'sala': None,
+            'articulo': None,
+            'fechaHoraInicio': inicio.strftime(fmt) if i % 997 else None,
+            'fechaHoraFin': fin.strftime(fmt),
+        }
+        if rnd.random() < 0.7:
+            res['sala'] = lista_salas[rnd.randrange(salas)]
+        else:
+            res['articulo'] = lista_articulos[rnd.randrange(articulos)]
+        lista_reservas.append(res)
+
+    return {
+        'persona': lista_personas,
+        'salas': lista_salas,
+        'articulo': lista_articulos,
+        'usuario': lista_usuarios,
+        'reservas': lista_reservas,
+    }
+
+
+class BackendSimulado:
+    """Estado en memoria del backend simulado y su servidor HTTP."""
+
+    def __init__(self, datos: dict, latencia: float = 0.0, jitter: float = 0.0):
+        self.datos = datos
+        self.latencia = latencia
+        self.jitter = jitter
+        self.llamadas = Counter()
+        self._cuerpos = {}
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def cargar(self, datos: dict):
+        with self._lock:
+            self.datos = datos
+            self._cuerpos.clear()
+            self.llamadas.clear()
+
+    def _cuerpo_listar(self, recurso: str) -> bytes:
+        # El JSON de cada lista se serializa una vez hasta la proxima escritura
+        with self._lock:
+            cuerpo = self._cuerpos.get(recurso)
+            if cuerpo is None:
+                cuerpo = json.dumps(self.datos.get(recurso, [])).encode()
+                self._cuerpos[recurso] = cuerpo
+            return cuerpo
+
+    def _escribir(self, metodo: str, recurso: str, accion: str, id_path, cuerpo: dict):
+        operacion, esperado = ACCIONES.get(accion, (None, None))
+        if operacion is None:
+            return 404, {'mensaje': f'Accion desconocida: {accion}'}
+        if metodo != esperado:
+            return 405, {'mensaje': f'{accion} espera {esperado}'}
+        campo = IDS.get(recurso, 'id')
+        with self._lock:
+            lista = self.datos.setdefault(recurso, [])
+            self._cuerpos.pop(recurso, None)
+            if operacion == 'crear':
+                nuevo = dict(cuerpo, **{campo: max((x.get(campo) or 0 for x in lista), default=0) + 1})
+                lista.append(nuevo)
+                return 200, nuevo
+            objetivo = id_path if id_path is not None else cuerpo.get(campo)
+            pos = next((i for i, x in enumerate(lista) if str(x.get(campo)) == str(objetivo)), None)
+            if pos is None:
+                return 404, {'mensaje': f'{recurso} {objetivo} no existe'}
+            if operacion == 'borrar':
+                lista.pop(pos)
+                return 200, {'mensaje': 'Eliminado'}
+            lista[pos] = dict(lista[pos], **cuerpo)
+            return 200, lista[pos]
+
+    def manejar(self, metodo: str, path: str, cuerpo: bytes):
+        """Devuelve (status, bytes, cabeceras extra) para la peticion."""
+        path = path.split('?', 1)[0]
+        self.llamadas[f"{metodo} {re.sub(r'/[0-9]+$', '/{id}', path)}"] += 1
+        if self.latencia or self.jitter:
+            time.sleep(self.latencia + random.random() * self.jitter)
+
+        if path == '/auth/login' and metodo == 'POST':
+            datos = json.dumps({'mensaje': 'Login correcto'}).encode()
+            return 200, datos, {'Set-Cookie': f'JSESSIONID=bench{random.getrandbits(48):x}; Path=/'}
+        if path == '/auth/logout':
+            return 200, b'{}', {}
+
+        partes = path.strip('/').split('/')
+        if len(partes) < 3 or partes[0] != 'api':
+            return 404, b'{"mensaje": "No encontrado"}', {}
+        recurso, accion = partes[1], partes[2]
+        id_path = partes[3] if len(partes) > 3 else None
+        if metodo == 'GET' and accion == 'listar':
+            return 200, self._cuerpo_listar(recurso), {}
+        try:
+            datos = json.loads(cuerpo) if cuerpo else {}
+        except ValueError:
+            datos = {}
+        status, respuesta = self._escribir(metodo, recurso, accion, id_path, datos if isinstance(datos, dict) else {})
+        return status, json.dumps(respuesta).encode(), {}
+
+    def iniciar(self, host: str = '127.0.0.1', puerto: int = 0) -> ThreadingHTTPServer:
+        """Arranca el servidor en un hilo y lo devuelve (puerto en server_port)."""
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeceras y cuerpo salen en escrituras separadas; con keep-alive,
+            # Nagle + ACK retardado del cliente sumarian ~40 ms por respuesta.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _responder(self):
+                largo = int(self.headers.get('Content-Length') or 0)
+                status, datos, cabeceras = backend.manejar(self.command, self.path, self.rfile.read(largo))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(datos)))
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _responder
+
+        self._servidor = ThreadingHTTPServer((host, puerto), Handler)
+        self._servidor.daemon_threads = True
+        threading.Thread(target=self._servidor.serve_forever, name='stub-backend', daemon=True).start()
+        return self._servidor
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reservas', type=int, default=1000)
+    parser.add_argument('--personas', type=int, default=None)
+    parser.add_argument('--salas', type=int, default=None)
+    parser.add_argument('--latencia', type=float, default=0.0, help='segundos por peticion')
+    parser.add_argument('--jitter', type=float, default=0.0, help='segundos aleatorios extra por peticion')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    args = parser.parse_args()
+
+    backend = BackendSimulado(generar(args.reservas, args.personas, args.salas), args.latencia, args.jitter)
+    servidor = backend.iniciar(args.host, args.puerto)
+    print(f"Backend simulado en http://{args.host}:{servidor.server_port} ({args.reservas} reservas)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        backend.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Sin precalculo ni pool de procesos: los tests no hablan con un backend real
+os.environ.setdefault('PREDICCION_PRECALCULO_INTERVALO', '0')
+os.environ.setdefault('PREDICCION_WORKERS', '0')
+os.environ.setdefault('BACKEND_BASE', 'http://127.0.0.1:9')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Worker recién arrancado: varios requests piden la analítica a la vez
+CARGA_CONCURRENTE = """
+import sys, threading
+import app
+assert 'analytics' not in sys.modules
+errores = []
+barrera = threading.Barrier(8)
+
+def usar():
+    barrera.wait()
+    try:
+        app.analitica().parse_fechas(['2024-01-01T09:00:00'])
+    except Exception as exc:
+        errores.append(repr(exc))
+
+hilos = [threading.Thread(target=usar) for _ in range(8)]
+for h in hilos:
+    h.start()
+for h in hilos:
+    h.join()
+assert not errores, errores
+assert app.arranque['analytics_ms'] is not None
+"""
+
+
+def test_carga_concurrente_en_frio():
+    env = dict(os.environ, PREDICCION_PRECALCULO_INTERVALO='0', PREDICCION_WORKERS='0', ANALYTICS_PRELOAD='0')
+    resultado = subprocess.run([sys.executable, '-c', CARGA_CONCURRENTE], cwd=RAIZ, env=env,
+                               capture_output=True, text=True, timeout=120)
+    assert resultado.returncode == 0, resultado.stderr
+
+
+def test_no_mide_una_carga_que_no_hizo(monkeypatch):
+    import app
+    import analytics
+    monkeypatch.setattr(app, '_analytics', {'modulo': None})
+    monkeypatch.setitem(app.arranque, 'analytics_ms', None)
+    assert app.analitica() is analytics
+    assert app.arranque['analytics_ms'] is None
@@ -0,0 +1,183 @@
+import random
+
+import pandas as pd
+
+import analytics
+import app as modulo
+
+
+def ns(texto):
+    return pd.Timestamp(texto).value
+
+
+def reserva(rid, inicio, fin, sala=None, articulo=None):
+    return modulo.normalizar_reserva({
+        'id': rid,
+        'persona': {'idPersona': 1, 'nombre': 'Ana'},
+        'sala': {'idSala': sala, 'nombre': f'Sala {sala}'} if sala is not None else None,
+        'articulo': {'idArticulo': articulo, 'nombre': f'Art {articulo}'} if articulo is not None else None,
+        'fechaHoraInicio': inicio,
+        'fechaHoraFin': fin,
+    })
+
+
+def snapshot(*reservas):
+    return modulo.Snapshot(list(reservas), 'test')
+
+
+def salas(*capacidades):
+    return [{'id': i + 1, 'name': f'Sala {i + 1}', 'capacidad': c} for i, c in enumerate(capacidades)]
+
+
+# ---------------------------
+#  Choques de reservas
+# ---------------------------
+
+def test_solapadas_por_recurso_e_intervalo():
+    snap = snapshot(
+        reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=1),
+        reserva(2, '2024-01-01T00:00:00', '2024-01-05T00:00:00', sala=1),
+        reserva(3, '2024-01-01T09:30:00', '2024-01-01T11:00:00', sala=2),
+        reserva(4, '2024-01-01T09:30:00', '2024-01-01T11:00:00', articulo=1),
+        reserva(5, 'no es fecha', '2024-01-01T11:00:00', sala=1),
+    )
+    assert sorted(analytics.solapadas(snap, 'sala:1', ns('2024-01-01T09:30'), ns('2024-01-01T09:45'))) == [1, 2]
+    assert analytics.solapadas(snap, 'sala:1', ns('2024-01-03T00:00'), ns('2024-01-03T01:00')) == [2]
+    assert analytics.solapadas(snap, 'articulo:1', ns('2024-01-01T11:00'), ns('2024-01-01T12:00')) == []
+    assert analytics.solapadas(snap, 'sala:9', ns('2024-01-01T09:00'), ns('2024-01-01T10:00')) == []
+    # Actualizar una reserva no choca consigo misma; un intervalo vacío no choca con nada
+    assert analytics.solapadas(snap, 'sala:2', ns('2024-01-01T10:00'), ns('2024-01-01T10:30'), excluir='3') == []
+    assert analytics.solapadas(snap, 'sala:1', ns('2024-01-01T10:00'), ns('2024-01-01T10:00')) == []
+
+
+def test_solapadas_contra_fuerza_bruta():
+    rnd = random.Random(11)
+    base = ns('2024-01-01')
+    minuto = 60 * 10 ** 9
+    intervalos = []
+    for rid in range(300):
+        ini = base + rnd.randrange(60 * 24 * 7) * minuto
+        intervalos.append((rid, rnd.randint(1, 3), ini, ini + rnd.choice([0, 15, 60, 60 * 24 * 3]) * minuto))
+    snap = snapshot(*[reserva(rid, pd.Timestamp(ini).isoformat(), pd.Timestamp(fin).isoformat(), sala=sala)
+                      for rid, sala, ini, fin in intervalos])
+    for _ in range(200):
+        sala = rnd.randint(1, 3)
+        desde = base + rnd.randrange(60 * 24 * 7) * minuto
+        hasta = desde + rnd.choice([1, 30, 600]) * minuto
+        esperadas = {rid for rid, s, ini, fin in intervalos if s == sala and ini < hasta and fin > desde}
+        assert set(analytics.solapadas(snap, f'sala:{sala}', desde, hasta)) == esperadas
+
+
+def test_conflictos_reserva_usa_el_snapshot(monkeypatch):
+    snap = snapshot(reserva(7, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=1))
+    monkeypatch.setattr(modulo.reservas_snapshot, 'obtener', lambda cookies: (200, snap, None))
+    payload = {'sala': {'idSala': 1}, 'articulo': None,
+               'fechaHoraInicio': '2024-01-01T09:30', 'fechaHoraFin': '2024-01-01T10:30'}
+    with modulo.app.test_request_context('/'):
+        assert modulo.conflictos_reserva(payload) == [7]
+        assert modulo.conflictos_reserva(payload, excluir=7) == []
+        assert modulo.conflictos_reserva(dict(payload, fechaHoraInicio='ayer')) is None
+    # Primera reserva de un sistema vacío
+    monkeypatch.setattr(modulo.reservas_snapshot, 'obtener', lambda cookies: (200, snapshot(), None))
+    with modulo.app.test_request_context('/'):
+        assert modulo.conflictos_reserva(payload) == []
+    assert modulo.mensaje_conflictos(payload, [7]) == 'La sala ya está reservada en ese horario (reservas 7)'
+
+
+def test_snapshot_sin_intervalos_validos_no_choca():
+    desde, hasta = ns('2024-01-01T09:00'), ns('2024-01-01T10:00')
+    for snap in (snapshot(), snapshot(reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00'),
+                                      reserva(2, 'no es fecha', '', sala=1))):
+        assert analytics.solapadas(snap, 'sala:1', desde, hasta) == []
+
+
+# ---------------------------
+#  Disponibilidad de salas
+# ---------------------------
+
+def test_salas_ocupadas_con_una_reserva_de_varios_dias():
+    snap = snapshot(
+        reserva(1, '2024-01-01T00:00:00', '2024-03-01T00:00:00', sala=1),
+        reserva(2, '2024-02-10T09:00:00', '2024-02-10T10:00:00', sala=2),
+        reserva(3, '2024-02-10T11:00:00', '2024-02-10T12:00:00', sala=3),
+        reserva(4, '2024-02-10T09:00:00', '2024-02-10T10:00:00', articulo=1),
+    )
+    assert analytics.salas_ocupadas(snap, ns('2024-02-10T09:30'), ns('2024-02-10T10:30')) == {'sala:1', 'sala:2'}
+    # Los extremos no solapan: [desde, hasta)
+    assert analytics.salas_ocupadas(snap, ns('2024-02-10T10:00'), ns('2024-02-10T11:00')) == {'sala:1'}
+    assert analytics.salas_ocupadas(snap, ns('2024-03-01T00:00'), ns('2024-03-02T00:00')) == set()
+
+
+def test_salas_libres_con_snapshot_vacio():
+    indice = analytics.indice_capacidad(salas(10, 20))
+    libres = analytics.salas_libres(snapshot(), indice, 0, ns('2024-01-01T09:00'), ns('2024-01-01T10:00'))
+    assert [s['id'] for s in libres] == [1, 2]
+    assert analytics.proximo_libre(snapshot(), 'sala:1', ns('2024-01-01T09:00'), 1) == ns('2024-01-01T09:00')
+
+
+def test_salas_libres_filtra_por_capacidad_y_ordena():
+    snap = snapshot(reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=2))
+    indice = analytics.indice_capacidad(salas(30, 10, None, 20))
+    libres = analytics.salas_libres(snap, indice, 15, ns('2024-01-01T09:00'), ns('2024-01-01T11:00'))
+    assert [s['id'] for s in libres] == [4, 1]
+    todas = analytics.salas_libres(snap, indice, 0, ns('2024-01-01T09:00'), ns('2024-01-01T11:00'))
+    assert [s['id'] for s in todas] == [3, 4, 1]
+
+
+def test_salas_libres_contra_fuerza_bruta():
+    rnd = random.Random(7)
+    base = ns('2024-01-01')
+    hora = 3600 * 10 ** 9
+    intervalos = []
+    reservas = []
+    for rid in range(400):
+        sala = rnd.randint(1, 30)
+        ini = base + rnd.randrange(24 * 30) * hora
+        fin = ini + rnd.choice([1, 2, 5, 24 * 4]) * hora
+        intervalos.append((sala, ini, fin))
+        reservas.append(reserva(rid, pd.Timestamp(ini).isoformat(), pd.Timestamp(fin).isoformat(), sala=sala))
+    snap = snapshot(*reservas)
+    indice = analytics.indice_capacidad(salas(*[rnd.randint(1, 50) for _ in range(30)]))
+    for _ in range(100):
+        desde = base + rnd.randrange(24 * 30) * hora
+        hasta = desde + rnd.choice([1, 3, 48]) * hora
+        capacidad = rnd.randint(0, 50)
+        esperadas = {s['id'] for s in indice['salas'] if s['capacidad'] >= capacidad
+                     and not any(sala == s['id'] and ini < hasta and fin > desde for sala, ini, fin in intervalos)}
+        assert {s['id'] for s in analytics.salas_libres(snap, indice, capacidad, desde, hasta)} == esperadas
+
+
+def test_proximo_libre_salta_reservas_encadenadas():
+    snap = snapshot(
+        reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=1),
+        reserva(2, '2024-01-01T10:00:00', '2024-01-01T10:30:00', sala=1),
+        reserva(3, '2024-01-01T11:00:00', '2024-01-01T12:00:00', sala=1),
+    )
+    hora = 3600 * 10 ** 9
+    assert analytics.proximo_libre(snap, 'sala:1', ns('2024-01-01T09:15'), hora) == ns('2024-01-01T12:00')
+    assert analytics.proximo_libre(snap, 'sala:1', ns('2024-01-01T09:15'), hora // 2) == ns('2024-01-01T10:30')
+    assert analytics.proximo_libre(snap, 'sala:1', ns('2024-01-01T08:00'), hora) == ns('2024-01-01T08:00')
+    assert analytics.proximo_libre(snap, 'sala:9', ns('2024-01-01T09:15'), hora) == ns('2024-01-01T09:15')
+
+
+def test_texto_instante_es_inverso_de_instante_param():
+    assert analytics.texto_instante(analytics.instante_param('2024-05-06T07:08')) == '2024-05-06T07:08'
+
+
+# ---------------------------
+#  Fechas
+# ---------------------------
+
+def test_parse_fechas_en_bloque_con_filas_de_otro_formato():
+    fechas = analytics.parse_fechas(['2024-01-01T09:00:00', '2024-01-02 10:30', '', None, 'mañana', '2024-01-03T08:00'])
+    assert list(fechas.iloc[[0, 1, 5]]) == [pd.Timestamp('2024-01-01 09:00'), pd.Timestamp('2024-01-02 10:30'),
+                                            pd.Timestamp('2024-01-03 08:00')]
+    assert fechas.iloc[[2, 3, 4]].isna().all()
+    assert analytics.parse_fechas([None, '']).isna().all()
+
+
+def test_parse_fechas_coincide_con_parse_dt():
+    valores = ['2024-02-29T23:59:59', '2024-02-30T10:00:00', '2024-03-01 00:00:00', '2024-03-01T07:05']
+    esperado = [analytics.parse_dt(v) for v in valores]
+    obtenido = [None if pd.isna(f) else f.to_pydatetime() for f in analytics.parse_fechas(valores)]
+    assert obtenido == esperado
@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app as modulo
+
+SALAS = [{'idSala': 1, 'nombre': 'Aula 1', 'capacidad': 20}]
+
+
+class BackendFalso:
+    """Reemplaza backend_send: responde siempre el mismo status y cuenta llamadas."""
+
+    def __init__(self, status):
+        self.status = status
+        self.llamadas = []
+
+    def __call__(self, method, path, **kwargs):
+        self.llamadas.append((method, path))
+        return SimpleNamespace(status_code=self.status)
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+    monkeypatch.setattr(modulo, 'listas_cache', modulo.TTLCache(600, 32))
+    monkeypatch.setattr(modulo, 'sesiones_validas', modulo.TTLCache(30, 32))
+    modulo.listas_cache.set('/api/salas/listar', SALAS)
+
+
+def usar_backend(monkeypatch, status):
+    falso = BackendFalso(status)
+    monkeypatch.setattr(modulo, 'backend_send', falso)
+    return falso
+
+
+def snapshot_vigente():
+    snap = modulo.ReservasSnapshot(30)
+    snap.actual = modulo.Snapshot([], 'v1')
+    snap._vigente_gen = snap._generacion
+    return snap
+
+
+def test_hit_con_sesion_revocada_devuelve_401_y_cierra_la_sesion(monkeypatch):
+    usar_backend(monkeypatch, 401)
+    with modulo.app.test_request_context('/salas'):
+        modulo.session['backend_session_id'] = 'revocada'
+        status, data, _ = modulo.backend_get('/api/salas/listar')
+        assert status == 401 and data == []
+        assert 'backend_session_id' not in modulo.session
+
+
+def test_hit_con_sesion_verificada_no_consulta_al_backend(monkeypatch):
+    falso = usar_backend(monkeypatch, 401)
+    modulo.sesiones_validas.set('buena', True)
+    assert modulo.backend_lectura('/api/salas/listar', {'JSESSIONID': 'buena'}) == (200, SALAS, None)
+    assert falso.llamadas == []
+
+
+def test_hit_sin_verificar_se_valida_una_vez(monkeypatch):
+    falso = usar_backend(monkeypatch, 200)
+    cookies = {'JSESSIONID': 'nueva'}
+    assert modulo.backend_lectura('/api/salas/listar', cookies)[0] == 200
+    assert falso.llamadas == [('GET', modulo.SESION_VALIDACION_PATH)]
+
+
+def test_un_401_revoca_una_sesion_verificada():
+    modulo.registrar_sesion('abc', 200, '/api/salas/listar')
+    assert modulo.autorizar_cache({'JSESSIONID': 'abc'}) == (200, None)
+    modulo.registrar_sesion('abc', 401, '/api/reservas/listar')
+    assert modulo.sesiones_validas.get('abc') is None
+
+
+def test_logout_revoca_la_sesion():
+    modulo.registrar_sesion('abc', 200, '/api/salas/listar')
+    modulo.registrar_sesion('abc', 200, '/auth/logout')
+    assert modulo.sesiones_validas.get('abc') is None
+
+
+def test_snapshot_vigente_no_se_entrega_a_una_sesion_revocada(monkeypatch):
+    usar_backend(monkeypatch, 401)
+    snap = snapshot_vigente()
+    assert snap.obtener({'JSESSIONID': 'revocada'}) == (401, None, None)
+    assert snap.obtener({}) == (401, None, None)
+
+
+def test_snapshot_sin_respuesta_del_backend_se_sirve(monkeypatch):
+    def caido(method, path, **kwargs):
+        raise modulo.requests.ConnectionError('caido')
+
+    monkeypatch.setattr(modulo, 'backend_send', caido)
+    snap = snapshot_vigente()
+    status, copia, _ = snap.obtener({'JSESSIONID': 'x'})
+    assert status == 200 and copia is snap.actual
+
+
+def test_vista_con_sesion_revocada_cierra_sesion(monkeypatch):
+    usar_backend(monkeypatch, 401)
+    cliente = modulo.app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion.update(user='ana@x', user_role='user', backend_session_id='revocada')
+    resp = cliente.get('/salas')
+    assert resp.status_code == 302 and resp.headers['Location'].endswith('/logout')
+    with cliente.session_transaction() as sesion:
+        assert 'backend_session_id' not in sesion
+
+
+def test_la_lista_de_usuarios_no_se_cachea(monkeypatch):
+    llamadas = []
+
+    def leer(path, cookies):
+        llamadas.append(cookies.get('JSESSIONID'))
+        return 200, [{'username': 'admin@x'}], None
+
+    monkeypatch.setattr(modulo, '_leer_json', leer)
+    modulo.backend_lectura('/api/usuario/listar', {'JSESSIONID': 'admin'})
+    modulo.backend_lectura('/api/usuario/listar', {'JSESSIONID': 'ana'})
+    assert llamadas == ['admin', 'ana']
+    assert modulo.listas_cache.get('/api/usuario/listar') is None
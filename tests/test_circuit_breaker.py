@@ -0,0 +1,69 @@
+import pytest
+
+import app as modulo
+
+LISTAR = modulo.CircuitBreaker.endpoint('GET', '/api/reservas/listar')
+
+
+class RespuestaCortada:
+    """Respuesta en streaming cuyo cuerpo se corta después del primer bloque."""
+
+    status_code = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, tamano):
+        yield b'[{"idReserva": 1},'
+        raise modulo.requests.ConnectionError('conexion cortada')
+
+
+class ClienteFalso:
+    def __init__(self, respuesta):
+        self.respuesta = respuesta
+
+    def request(self, **kwargs):
+        return self.respuesta
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    cb = modulo.CircuitBreaker(umbral=2, espera=60)
+    monkeypatch.setattr(modulo, 'circuit_breaker', cb)
+    return cb
+
+
+def test_endpoint_normaliza_ids():
+    assert modulo.CircuitBreaker.endpoint('delete', '/api/reservas/eliminar/42?x=1') == 'DELETE /api/reservas/eliminar/{id}'
+
+
+def test_abre_tras_el_umbral_y_deja_pasar_una_prueba(breaker, monkeypatch):
+    assert breaker.permitir('GET /x')
+    breaker.fallo('GET /x')
+    breaker.fallo('GET /x')
+    assert not breaker.permitir('GET /x')
+    reloj = modulo.time.monotonic() + 61
+    monkeypatch.setattr(modulo.time, 'monotonic', lambda: reloj)
+    assert breaker.permitir('GET /x')
+    assert not breaker.permitir('GET /x')
+    breaker.exito('GET /x')
+    assert breaker.permitir('GET /x')
+
+
+def test_un_exito_reinicia_los_fallos(breaker):
+    breaker.fallo('GET /x')
+    breaker.exito('GET /x')
+    breaker.fallo('GET /x')
+    assert breaker.permitir('GET /x')
+
+
+def test_cuerpo_cortado_en_streaming_cuenta_como_fallo(breaker, monkeypatch):
+    monkeypatch.setattr(modulo, 'backend_client', lambda: ClienteFalso(RespuestaCortada()))
+    snap = modulo.ReservasSnapshot(30)
+    for _ in range(2):
+        status, copia, error = snap.obtener({'JSESSIONID': 'abc'})
+        assert status is None and copia is None and 'conexion cortada' in error
+    assert not breaker.permitir(LISTAR)
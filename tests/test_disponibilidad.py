@@ -0,0 +1,59 @@
+import pytest
+
+import app as modulo
+from test_analytics import reserva, snapshot
+
+SALAS = [
+    {'idSala': 1, 'nombre': 'Aula 1', 'Capacidad': 10},
+    {'idSala': 2, 'nombre': 'Aula 2', 'capacidad': '40'},
+    {'idSala': 3, 'nombre': 'Aula 3'},
+]
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    snap = snapshot(
+        reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=2),
+        reserva(2, '2024-01-01T10:00:00', '2024-01-01T11:00:00', sala=2),
+    )
+    monkeypatch.setattr(modulo, '_lecturas_disponibilidad', lambda: ((200, snap, None), (200, SALAS, None)))
+    c = modulo.app.test_client()
+    with c.session_transaction() as sesion:
+        sesion.update(user='ana@x', user_role='user', backend_session_id='abc')
+    return c
+
+
+def test_salas_libres_por_capacidad(cliente):
+    datos = cliente.get('/api/disponibilidad?inicio=2024-01-01T09:30&fin=2024-01-01T10:30').get_json()
+    assert [s['id'] for s in datos['libres']] == [3, 1]
+    assert datos['total_libres'] == 2
+    datos = cliente.get('/api/disponibilidad?inicio=2024-01-01T11:00&fin=2024-01-01T12:00&capacidad=20').get_json()
+    assert [s['id'] for s in datos['libres']] == [2]
+
+
+def test_proximo_hueco_de_una_sala(cliente):
+    datos = cliente.get('/api/disponibilidad?sala=2&duracion=30&desde=2024-01-01T09:15').get_json()
+    assert datos['proximo']['inicio'] == '2024-01-01T11:00'
+    assert datos['proximo']['fin'] == '2024-01-01T11:30'
+    assert datos['libres'] is None
+
+
+@pytest.mark.parametrize('consulta', [
+    'inicio=2024-01-01T10:00&fin=2024-01-01T09:00',
+    'inicio=ayer&fin=2024-01-01T09:00',
+    'inicio=2024-01-01T09:00&fin=2024-01-01T10:00&capacidad=muchas',
+    'sala=99',
+    'sala=1&duracion=0',
+])
+def test_parametros_invalidos_devuelven_400(cliente, consulta):
+    resp = cliente.get(f'/api/disponibilidad?{consulta}')
+    assert resp.status_code == 400 and resp.get_json()['errores']
+
+
+def test_sin_reservas_todas_las_salas_estan_libres(cliente, monkeypatch):
+    monkeypatch.setattr(modulo, '_lecturas_disponibilidad',
+                        lambda: ((200, snapshot(), None), (200, SALAS, None)))
+    consulta = 'inicio=2024-01-01T09:00&fin=2024-01-01T10:00&sala=1&duracion=30&desde=2024-01-01T09:00'
+    datos = cliente.get(f'/api/disponibilidad?{consulta}').get_json()
+    assert datos['total_libres'] == 3
+    assert datos['proximo']['inicio'] == '2024-01-01T09:00'
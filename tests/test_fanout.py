@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import app as modulo
+
+
+def esperar(condicion, limite=5):
+    fin = time.monotonic() + limite
+    while not condicion() and time.monotonic() < fin:
+        time.sleep(0.001)
+    assert condicion()
+
+
+def test_single_flight_agrupa_llamadas_concurrentes():
+    sf = modulo.SingleFlight()
+    liberar = threading.Event()
+    llamadas = []
+
+    def lenta():
+        llamadas.append(1)
+        liberar.wait(5)
+        return 'ok'
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(sf.hacer('k', lenta))) for _ in range(4)]
+    hilos[0].start()
+    esperar(lambda: sf.stats()['en_curso'])
+    for h in hilos[1:]:
+        h.start()
+    esperar(lambda: sf.agrupadas == 3)
+    liberar.set()
+    for h in hilos:
+        h.join()
+    assert len(llamadas) == 1
+    assert sorted(resultados) == [('ok', False)] + [('ok', True)] * 3
+
+
+def test_single_flight_propaga_la_excepcion_a_todos():
+    sf = modulo.SingleFlight()
+
+    def falla():
+        raise ValueError('x')
+
+    try:
+        sf.hacer('k', falla)
+    except ValueError:
+        pass
+    assert sf.stats()['en_curso'] == 0
+
+
+def test_deadline_devuelve_timeout_sin_esperar_la_lectura_lenta():
+    liberar = threading.Event()
+    terminada = threading.Event()
+
+    def lenta(cookies):
+        liberar.wait(5)
+        terminada.set()
+        return 200, ['dato'], None
+
+    with modulo.app.test_request_context('/'):
+        resultados = modulo.backend_fetch_many({'a': lenta, 'b': lambda cookies: (200, [], None)}, deadline=0.05)
+    assert resultados['a'] == (None, [], 'Tiempo de espera agotado')
+    assert resultados['b'] == (200, [], None)
+    liberar.set()
+    assert terminada.wait(5)
+
+
+def test_timeout_de_un_pedido_no_cancela_la_prediccion_compartida():
+    pool = modulo.ForecastPool(workers=0, cola_max=2)
+    compartido = Future()
+    assert pool.esperar(compartido, 0.01) is None
+    assert not compartido.cancelled()
+    # Otro pedido con la misma clave (p.ej. el precalculo) sigue esperando y recibe el resultado
+    threading.Timer(0.05, compartido.set_result, args=('prediccion',)).start()
+    assert pool.esperar(compartido, 5) == 'prediccion'
+    assert pool.stats()['timeouts'] == 1
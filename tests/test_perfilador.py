@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import app as modulo
+
+PERFIL = '20260101-120000-abcdef'
+
+
+@pytest.fixture
+def perfilador(monkeypatch, tmp_path):
+    p = modulo.Perfilador(str(tmp_path), max_mb=1, intervalo=0.005)
+    monkeypatch.setattr(modulo, 'perfilador', p)
+    return p
+
+
+def guardar(directorio, perfil_id, txt=True):
+    datos = {'id': perfil_id, 'metodo': 'GET', 'path': '/salas', 'status': 200, 'duracion_ms': 1.0,
+             'modo': 'muestreo', 'fecha': '2026-01-01T12:00:00', 'muestras': 1, 'intervalo_ms': 5, 'top': []}
+    (directorio / f'{perfil_id}.json').write_text(json.dumps(datos), encoding='utf-8')
+    if txt:
+        (directorio / f'{perfil_id}.txt').write_text('a;b;c 3\n', encoding='utf-8')
+
+
+def cliente_admin():
+    cliente = modulo.app.test_client()
+    with cliente.session_transaction() as sesion:
+        sesion.update(user='admin@x', user_role='admin', backend_session_id='abc')
+    return cliente
+
+
+def test_detalle_sin_archivo_de_pilas_no_falla(perfilador, tmp_path):
+    guardar(tmp_path, PERFIL, txt=False)
+    resp = cliente_admin().get(f'/admin/perfiles/{PERFIL}')
+    assert resp.status_code == 200
+    assert perfilador.pilas(PERFIL) == []
+
+
+def test_detalle_muestra_las_pilas(perfilador, tmp_path):
+    guardar(tmp_path, PERFIL)
+    assert perfilador.pilas(PERFIL) == ['a;b;c 3']
+    assert 'a;b;c 3' in cliente_admin().get(f'/admin/perfiles/{PERFIL}').get_data(as_text=True)
+
+
+def test_id_invalido_no_sale_del_directorio(perfilador):
+    assert perfilador.archivo('../etc/passwd', 'txt') is None
+
+
+def test_poda_ignora_archivos_que_borro_otro_worker(perfilador, tmp_path, monkeypatch):
+    perfilador.max_bytes = 0
+    guardar(tmp_path, PERFIL)
+
+    def ya_borrado(ruta):
+        raise FileNotFoundError(ruta)
+
+    monkeypatch.setattr(modulo.os, 'remove', ya_borrado)
+    perfilador._podar_disco()
+
+
+def test_poda_borra_los_perfiles_mas_viejos(perfilador, tmp_path):
+    viejo, nuevo = '20260101-000000-aaaaaa', '20260102-000000-bbbbbb'
+    guardar(tmp_path, viejo)
+    guardar(tmp_path, nuevo)
+    perfilador.max_bytes = sum(f.stat().st_size for f in tmp_path.glob(f'{nuevo}.*'))
+    perfilador._podar_disco()
+    assert sorted(f.name for f in tmp_path.iterdir()) == [f'{nuevo}.json', f'{nuevo}.txt']
@@ -0,0 +1,87 @@
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app as modulo
+
+
+class Arranque:
+    def __init__(self):
+        self.veces = 0
+
+    def __call__(self):
+        self.veces += 1
+
+
+def preparar(monkeypatch, usuario):
+    arranque = Arranque()
+    monkeypatch.setattr(modulo.precalculo, 'iniciar', arranque)
+    monkeypatch.setattr(modulo, 'PREDICCION_PRECALCULO_INTERVALO', 60)
+    monkeypatch.setattr(modulo, 'BACKEND_SERVICE_USER', usuario)
+    monkeypatch.setattr(modulo, '_precalculo_pid', {'pid': None})
+    return arranque
+
+
+def test_sin_usuario_de_servicio_no_arranca(monkeypatch):
+    arranque = preparar(monkeypatch, '')
+    modulo.iniciar_precalculo()
+    assert arranque.veces == 0
+    assert modulo.precalculo._cookies() is None
+
+
+def test_arranca_una_vez_por_proceso(monkeypatch):
+    arranque = preparar(monkeypatch, 'servicio@x')
+    modulo.iniciar_precalculo()
+    modulo.iniciar_precalculo()
+    assert arranque.veces == 1
+
+
+def test_arranca_en_el_primer_request_y_no_al_importar(monkeypatch):
+    arranque = preparar(monkeypatch, 'servicio@x')
+    assert arranque.veces == 0
+    modulo.app.test_client().get('/login')
+    assert arranque.veces == 1
+
+
+def test_backend_cookies_usa_solo_la_sesion_del_usuario():
+    with modulo.app.test_request_context('/'):
+        assert modulo.backend_cookies() == {}
+        modulo.session['backend_session_id'] = 'abc'
+        assert modulo.backend_cookies() == {'JSESSIONID': 'abc'}
+
+
+@pytest.fixture
+def publicado(monkeypatch):
+    resultado = dict.fromkeys(modulo.PREDICCION_CLAVES, [])
+    monkeypatch.setattr(modulo.precalculo, 'publicado', {
+        'total': resultado, 'recursos': {'recursos': [], 'predicciones': {}, 'pendientes': []},
+        'generado': datetime(2026, 1, 1), 'generado_en': time.monotonic(), 'duracion_ms': 1.0,
+    })
+    monkeypatch.setattr(modulo, 'sesiones_validas', modulo.TTLCache(30, 32))
+
+
+def cliente(backend_session):
+    c = modulo.app.test_client()
+    with c.session_transaction() as sesion:
+        sesion.update(user='ana@x', user_role='user', backend_session_id=backend_session)
+    return c
+
+
+def test_prediccion_publicada_no_se_sirve_a_una_sesion_revocada(publicado, monkeypatch):
+    monkeypatch.setattr(modulo, 'backend_send', lambda method, path, **kw: SimpleNamespace(status_code=401))
+    c = cliente('revocada')
+    resp = c.get('/prediccion')
+    assert resp.status_code == 302 and resp.headers['Location'].endswith('/logout')
+    c = cliente('revocada')
+    assert c.get('/api/prediccion/recursos').status_code == 401
+    with c.session_transaction() as sesion:
+        assert 'backend_session_id' not in sesion
+
+
+def test_prediccion_publicada_se_sirve_a_una_sesion_valida(publicado):
+    modulo.sesiones_validas.set('buena', True)
+    c = cliente('buena')
+    assert c.get('/prediccion').status_code == 200
+    assert c.get('/api/prediccion/recursos').get_json()['frescura'] is not None
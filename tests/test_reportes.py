@@ -0,0 +1,59 @@
+import pytest
+
+import app as modulo
+from test_analytics import reserva, snapshot
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    estado = {'snap': snapshot(
+        reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=1),
+        reserva(2, '2024-01-01T11:00:00', '2024-01-01T12:00:00', sala=1),
+        reserva(3, '2024-01-02T09:00:00', '2024-01-02T10:00:00', articulo=1),
+    )}
+    monkeypatch.setattr(modulo.reservas_snapshot, 'obtener', lambda cookies: (200, estado['snap'], None))
+    c = modulo.app.test_client()
+    with c.session_transaction() as sesion:
+        sesion.update(user='ana@x', user_role='user', backend_session_id='abc')
+    c.estado = estado
+    return c
+
+
+def test_metricas_con_etag_y_304(cliente):
+    resp = cliente.get('/api/reportes/metricas')
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+    assert 'no-cache' in resp.headers['Cache-Control'] and 'private' in resp.headers['Cache-Control']
+    assert resp.get_json()['total'] == 3
+
+    resp = cliente.get('/api/reportes/metricas', headers={'If-None-Match': etag})
+    assert resp.status_code == 304 and resp.data == b''
+    assert resp.headers['ETag'] == etag
+
+
+def test_cambia_el_etag_con_una_version_nueva(cliente):
+    etag = cliente.get('/api/reportes/metricas').headers['ETag']
+    cliente.estado['snap'] = modulo.Snapshot(cliente.estado['snap'].records[:2], 'otra')
+    resp = cliente.get('/api/reportes/metricas', headers={'If-None-Match': etag})
+    assert resp.status_code == 200 and resp.headers['ETag'] != etag
+    assert resp.get_json()['total'] == 2
+
+
+def test_sesion_expirada_devuelve_401(cliente, monkeypatch):
+    monkeypatch.setattr(modulo.reservas_snapshot, 'obtener', lambda cookies: (401, None, None))
+    assert cliente.get('/api/reportes/metricas').status_code == 401
+    with cliente.session_transaction() as sesion:
+        assert 'backend_session_id' not in sesion
+
+
+def test_metricas_reportes_cuenta_por_recurso_y_fecha():
+    snap = snapshot(
+        reserva(1, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=1),
+        reserva(2, '2024-01-01T11:00:00', '2024-01-01T12:00:00', sala=1),
+        reserva(3, '2024-01-02T09:00:00', '2024-01-02T10:00:00', articulo=1),
+        reserva(4, '03/01/2024', '', articulo=1),
+    )
+    m = modulo.analitica().metricas_reportes(snap)
+    assert m['total'] == 4
+    assert dict(zip(m['recurso_labels'], m['recurso_vals'])) == {'Sala: Sala 1': 2, 'Artículo: Art 1': 2}
+    assert dict(zip(m['fecha_labels'], m['fecha_vals'])) == {'2024-01-01': 2, '2024-01-02': 1, '03/01/2024': 1}
@@ -0,0 +1,66 @@
+import pandas as pd
+
+import app as modulo
+from test_analytics import reserva, snapshot
+
+
+def ids(pagina):
+    return [r['id'] for r in pagina['reservas']]
+
+
+def tabla():
+    return snapshot(
+        reserva(1, '2024-01-03T09:00:00', '2024-01-03T10:00:00', sala=1),
+        reserva(2, '2024-01-01T09:00:00', '2024-01-01T10:00:00', sala=2),
+        reserva(3, '', '', articulo=1),
+        reserva(4, '2024-01-02T09:00:00', '2024-01-02T10:00:00', sala=1),
+        reserva(5, '2024-01-05T09:00:00', '2024-01-05T10:00:00', articulo=1),
+    )
+
+
+def test_paginas_en_el_orden_del_backend():
+    snap = tabla()
+    primera = modulo.pagina_reservas(snap, {'size': '2'})
+    assert ids(primera) == [1, 2]
+    assert (primera['total'], primera['pages'], primera['page']) == (5, 3, 1)
+    assert ids(modulo.pagina_reservas(snap, {'size': '2', 'page': '3'})) == [5]
+    # Página fuera de rango o parámetros inválidos: se corrigen
+    assert modulo.pagina_reservas(snap, {'size': '2', 'page': '99'})['page'] == 3
+    assert modulo.pagina_reservas(snap, {'size': 'x', 'page': 'y'})['size'] == modulo.RESERVAS_PAGINA_DEFAULT
+    assert ids(modulo.pagina_reservas(snap, {'dir': 'desc'})) == [5, 4, 3, 2, 1]
+
+
+def test_orden_por_inicio_con_vacios_al_final():
+    snap = tabla()
+    assert ids(modulo.pagina_reservas(snap, {'sort': 'inicio'})) == [2, 4, 1, 5, 3]
+    assert ids(modulo.pagina_reservas(snap, {'sort': 'inicio', 'dir': 'desc'})) == [3, 5, 1, 4, 2]
+    assert modulo.pagina_reservas(snap, {'sort': 'otro'})['sort'] == ''
+
+
+def test_filtros_por_recurso_y_fecha():
+    snap = tabla()
+    assert ids(modulo.pagina_reservas(snap, {'sala': '1', 'sort': 'inicio'})) == [4, 1]
+    assert ids(modulo.pagina_reservas(snap, {'articulo': '1'})) == [3, 5]
+    # hasta incluye el día completo; las reservas sin inicio no pasan un filtro de fecha
+    pagina = modulo.pagina_reservas(snap, {'desde': '2024-01-02', 'hasta': '2024-01-03'})
+    assert ids(pagina) == [1, 4]
+    assert pagina['filtros'] == {'desde': '2024-01-02', 'hasta': '2024-01-03'}
+    assert modulo.pagina_reservas(snap, {'sala': '9'})['total'] == 0
+
+
+def test_eventos_rango_incluye_reservas_largas_y_excluye_los_extremos():
+    snap = snapshot(
+        reserva(1, '2024-01-01T00:00:00', '2024-02-01T00:00:00', sala=1),
+        reserva(2, '2024-01-10T09:00:00', '2024-01-10T10:00:00', sala=2),
+        reserva(3, '2024-01-20T09:00:00', '2024-01-20T10:00:00', sala=2),
+        reserva(4, '2024-01-15T09:00:00', '', sala=2),
+    )
+
+    def rango(desde, hasta):
+        eventos = modulo.analitica().eventos_rango(snap, pd.Timestamp(desde).value, pd.Timestamp(hasta).value)
+        return sorted(e['start'] for e in eventos)
+
+    assert rango('2024-01-15', '2024-01-16') == ['2024-01-01T00:00:00', '2024-01-15T09:00:00']
+    assert rango('2024-01-10T10:00', '2024-01-20T09:00') == ['2024-01-01T00:00:00', '2024-01-15T09:00:00']
+    assert rango('2024-02-01', '2024-03-01') == []
+    assert len(modulo.analitica().eventos_rango(snap)) == 4
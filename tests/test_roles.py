@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+import app as modulo
+
+
+def usuarios(*pares):
+    return [{'username': u, 'roles': [{'nombre': f'ROLE_{r.upper()}'}]} for u, r in pares]
+
+
+class BackendFalso:
+    """Reemplaza _backend_get_json: cuenta llamadas y puede frenar la primera."""
+
+    def __init__(self, data, status=200):
+        self.data = data
+        self.status = status
+        self.llamadas = 0
+        self.freno = None
+
+    def __call__(self, path, cookies):
+        assert path == '/api/usuario/listar'
+        self.llamadas += 1
+        if self.freno is not None:
+            self.freno.wait(5)
+        return self.status, list(self.data), None
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    falso = BackendFalso(usuarios(('admin@x', 'admin'), ('ana@x', 'user')))
+    monkeypatch.setattr(modulo, '_backend_get_json', falso)
+    return falso
+
+
+def test_indice_frio_resuelve_el_rol(backend):
+    idx = modulo.RolesIndex(ttl=60, min_refresh=5)
+    assert idx.resolver('admin@x', {}) == 'admin'
+    assert idx.resolver('ana@x', {}) == 'user'
+    assert backend.llamadas == 1
+
+
+def test_login_concurrente_espera_el_refresco_en_curso(backend):
+    idx = modulo.RolesIndex(ttl=60, min_refresh=5)
+    backend.freno = threading.Event()
+    resultados = {}
+
+    def login(nombre):
+        resultados[nombre] = idx.resolver('admin@x', {})
+
+    hilos = [threading.Thread(target=login, args=(k,)) for k in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    time.sleep(0.1)
+    backend.freno.set()
+    for hilo in hilos:
+        hilo.join()
+    assert resultados == {k: 'admin' for k in range(5)}
+    assert backend.llamadas == 1
+
+
+def test_indice_vencido_no_concede_un_rol_revocado(backend):
+    idx = modulo.RolesIndex(ttl=0.05, min_refresh=0)
+    assert idx.resolver('admin@x', {}) == 'admin'
+    backend.data = usuarios(('admin@x', 'user'))
+    time.sleep(0.06)
+    assert idx.resolver('admin@x', {}) == 'user'
+
+
+def test_usuario_creado_despues_de_cargar_el_indice(backend):
+    idx = modulo.RolesIndex(ttl=60, min_refresh=5)
+    assert idx.resolver('ana@x', {}) == 'user'
+    backend.data = backend.data + usuarios(('nuevo@x', 'admin'))
+    idx.invalidate()
+    assert idx.resolver('nuevo@x', {}) == 'admin'
+
+
+def test_usuario_desconocido_no_descarga_de_nuevo_enseguida(backend):
+    idx = modulo.RolesIndex(ttl=60, min_refresh=5)
+    assert idx.resolver('admin@x', {}) == 'admin'
+    assert idx.resolver('nadie@x', {}) is None
+    assert backend.llamadas == 1
+
+
+def test_refresco_fallido_no_usa_datos_viejos(backend):
+    idx = modulo.RolesIndex(ttl=0.05, min_refresh=0)
+    assert idx.resolver('admin@x', {}) == 'admin'
+    backend.status = 503
+    time.sleep(0.06)
+    assert idx.resolver('admin@x', {}) is None
+
+
+def test_login_guarda_el_rol_del_backend(backend, monkeypatch):
+    monkeypatch.setattr(modulo, 'roles_index', modulo.RolesIndex(ttl=60, min_refresh=5))
+    monkeypatch.setattr(modulo, 'authenticate_backend', lambda u, p: ('sesion-1', 'ok'))
+    modulo.app.config['WTF_CSRF_ENABLED'] = False
+    cliente = modulo.app.test_client()
+    resp = cliente.post('/login', data={'email': 'admin@x', 'password': 'x'})
+    assert resp.status_code == 302
+    with cliente.session_transaction() as sesion:
+        assert sesion['user_role'] == 'admin'
+        assert sesion['backend_session_id'] == 'sesion-1'
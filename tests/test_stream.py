@@ -0,0 +1,62 @@
+import json
+import random
+
+import pytest
+
+import app as modulo
+
+
+def en_bloques(texto, tamano):
+    datos = texto.encode('utf-8')
+    return [datos[i:i + tamano] for i in range(0, len(datos), tamano)]
+
+
+DATOS = [
+    {'id': 1, 'nombre': 'Ñandú', 'monto': 1.5e3},
+    {'id': 2, 'lista': [1, 2, {'x': None}], 'texto': 'coma, y ] corchete'},
+    12345,
+    -0.25,
+    'cadena',
+    True,
+    None,
+]
+
+
+@pytest.mark.parametrize('tamano', [1, 2, 3, 7, 64, 10 ** 6])
+def test_reconstruye_el_array_con_cualquier_corte(tamano):
+    texto = json.dumps(DATOS, ensure_ascii=False, indent=1)
+    assert list(modulo.iter_json_array(en_bloques(texto, tamano))) == DATOS
+
+
+def test_numero_partido_entre_bloques():
+    assert list(modulo.iter_json_array([b'[12', b'34', b'5.', b'5e', b'1]'])) == [12345.5e1]
+    assert list(modulo.iter_json_array([b'[1', b',2', b']'])) == [1, 2]
+
+
+def test_al_leer_recibe_cada_bloque_crudo():
+    bloques = en_bloques(json.dumps(DATOS), 5)
+    vistos = []
+    list(modulo.iter_json_array(bloques, vistos.append))
+    assert vistos == bloques
+
+
+def test_cuerpo_vacio_o_que_no_es_array():
+    assert list(modulo.iter_json_array([])) == []
+    assert list(modulo.iter_json_array([b'  ', b'[ ]'])) == []
+    assert list(modulo.iter_json_array([b'{"a"', b': 1}'])) == []
+    assert list(modulo.iter_json_array([b'null'])) == []
+
+
+@pytest.mark.parametrize('cuerpo', [b'[1, 2', b'[1 2]', b'[{"a": }]', b'[1,]'])
+def test_json_invalido_lanza_value_error(cuerpo):
+    with pytest.raises(ValueError):
+        list(modulo.iter_json_array(en_bloques(cuerpo.decode(), 2)))
+
+
+def test_aleatorio_contra_json_loads():
+    rnd = random.Random(3)
+    for _ in range(50):
+        datos = [{'id': rnd.randint(-10 ** 6, 10 ** 6), 'v': rnd.random() * 10 ** rnd.randint(-5, 5),
+                  's': 'é' * rnd.randint(0, 3)} for _ in range(rnd.randint(0, 20))]
+        texto = json.dumps(datos, ensure_ascii=False)
+        assert list(modulo.iter_json_array(en_bloques(texto, rnd.randint(1, 9)))) == json.loads(texto)
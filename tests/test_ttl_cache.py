@@ -0,0 +1,53 @@
+import app as modulo
+
+
+def test_expira_pasado_el_ttl(monkeypatch):
+    reloj = [100.0]
+    monkeypatch.setattr(modulo.time, 'monotonic', lambda: reloj[0])
+    cache = modulo.TTLCache(ttl=10, maxsize=4)
+    cache.set('a', 1)
+    reloj[0] += 4
+    assert cache.get_con_edad('a') == (1, 4.0)
+    assert cache.edad('a') == 4.0
+    reloj[0] += 7
+    assert cache.get('a') is None
+    assert cache.edad('a') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_desaloja_el_menos_usado():
+    cache = modulo.TTLCache(ttl=60, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_no_guarda_un_valor_leido_antes_de_invalidar():
+    cache = modulo.TTLCache(ttl=60, maxsize=4)
+    generacion = cache.generacion
+    cache.invalidate('/api/salas/')
+    cache.set('/api/salas/listar', ['viejo'], generacion)
+    assert cache.get('/api/salas/listar') is None
+    cache.set('/api/salas/listar', ['nuevo'], cache.generacion)
+    assert cache.get('/api/salas/listar') == ['nuevo']
+
+
+def test_invalidar_por_prefijo():
+    cache = modulo.TTLCache(ttl=60, maxsize=4)
+    cache.set('/api/salas/listar', 1)
+    cache.set('/api/persona/listar', 2)
+    assert cache.invalidate('/api/salas/') == 1
+    assert cache.get('/api/salas/listar') is None and cache.get('/api/persona/listar') == 2
+
+
+def test_una_escritura_invalida_la_lista_del_recurso(monkeypatch):
+    monkeypatch.setattr(modulo, 'listas_cache', modulo.TTLCache(600, 32))
+    modulo.listas_cache.set('/api/salas/listar', ['sala'])
+    modulo.listas_cache.set('/api/persona/listar', ['persona'])
+    modulo.invalidar_recurso('/api/salas/actualizar')
+    assert modulo.listas_cache.get('/api/salas/listar') is None
+    assert modulo.listas_cache.get('/api/persona/listar') == ['persona']